@@ -1,17 +1,47 @@
 """A base class for all serialisable classes"""
 from abc import ABC, abstractmethod
+from typing import Optional
 import logging
 import joblib
 
-log = logging.getLogger(_name_)
+log = logging.getLogger(__name__)
+
+#: The compression codecs accepted by Base.save.
+COMPRESSION_CODECS = ("zlib", "gzip", "bz2", "lzma", "xz", "lz4")
 
 class Base(ABC):
     """A Base component for all class objects."""
     @classmethod
-    def from_pickle(cls, path: str):
+    def from_pickle(cls, path: str, mmap_mode: Optional[str] = None):
+        """Loads an object saved with ``save``.
+
+        Args:
+            path: The path of the saved object.
+            mmap_mode (optional): A numpy memmap mode (e.g. 'r' or 'c') to memory-map the
+                large arrays of an uncompressed save instead of reading them, so processes
+                loading the same file share pages. Compressed saves are read in full.
+
+        Returns:
+            The loaded object.
+
+        """
         log.info(f"Loading Dataset from Path: {path}")
-        return joblib.load(path)
-    
-    def save(self, path: str):
+        return joblib.load(path, mmap_mode=mmap_mode)
+
+    def save(self, path: str, compression: Optional[str] = None, level: int = 3):
+        """Saves the object with joblib.
+
+        Uncompressed saves are the fastest to write and load and can be memory-mapped
+        by ``from_pickle``. Compression trades save time for size: 'lz4' (requires the
+        lz4 package) and 'zlib' at a low level are fast, 'lzma'/'xz' are the smallest.
+
+        Args:
+            path: The path to save to.
+            compression (optional): The codec, one of COMPRESSION_CODECS, or None.
+            level (optional): The compression level from 1 to 9.
+
+        """
+        if compression is not None and compression not in COMPRESSION_CODECS:
+            raise ValueError(f"compression must be one of {COMPRESSION_CODECS}, got {compression!r}")
         log.info(f"Saving Dataset to Path: {path}")
-        joblib.dump(self, path)
\ No newline at end of file
+        joblib.dump(self, path, compress=(compression, level) if compression else 0)
@@ -0,0 +1,56 @@
+"""Helpers to defer importing heavy optional dependencies until first use"""
+import sys
+import importlib
+from types import ModuleType
+from typing import Callable, Dict, List, Tuple
+
+def lazy_import(name: str) -> ModuleType:
+    """Returns a stand-in for a module that imports it when an attribute is first accessed.
+
+    Args:
+        name: The absolute module name (e.g. 'pymc3' or 'statsmodels.tsa.stattools').
+
+    Returns:
+        The module if already imported, otherwise a stand-in that raises ImportError on
+        first use if the module is not installed.
+
+    """
+    return sys.modules.get(name) or _LazyModule(name)
+
+
+def lazy_attributes(package: str, attributes: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """Builds the module ``__getattr__`` and ``__dir__`` of a package exporting attributes lazily.
+
+    Args:
+        package: The package name, i.e. ``__name__`` of the calling ``__init__``.
+        attributes: The exported names mapped to the relative module defining them,
+            optionally as 'module:attribute' when the name differs.
+
+    Returns:
+        The ``__getattr__`` and ``__dir__`` functions for the package.
+
+    """
+    def __getattr__(name: str):
+        if name not in attributes:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        module, _, attribute = attributes[name].partition(":")
+        value = getattr(importlib.import_module(module, package), attribute or name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(attributes))
+
+    return __getattr__, __dir__
+
+
+class _LazyModule(ModuleType):
+    """A module stand-in that imports the real module on first attribute access."""
+    def __getattr__(self, attribute: str):
+        if attribute.startswith("__"):
+            raise AttributeError(attribute)
+        try:
+            module = importlib.import_module(self.__name__)
+        except ImportError as e:
+            raise ImportError(f"{self.__name__} is required for this feature: {e}") from e
+        return getattr(module, attribute)
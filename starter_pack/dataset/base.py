@@ -1,8 +1,18 @@
-from typing import Optional
-from ds.core.base import Base
-from ds.processing import ProcessorPipeline
+import os
+import copy
+import logging
+import joblib
+import numpy as np
+from abc import abstractmethod
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+from starter_pack.core.base import Base
+from starter_pack.processing import ProcessorPipeline
 from sklearn.model_selection import KFold
 
+log = logging.getLogger(__name__)
+
 class Dataset(Base):
     """
     Dataset is bundle of train / test data and dataset metadata.
@@ -50,16 +60,49 @@ class Dataset(Base):
         return self.processor.inverse_transform(pred, transform_features=False)
     
     @classmethod
-    def from_splits(cls, folds=5, **kwargs):
+    def from_splits(cls, folds: int = 5, n_jobs: int = 1, cache_dir: Optional[str] = None, **kwargs) -> Iterator["Dataset"]:
+        """Yields a dataset per k-fold split, with the processor fit on each training fold.
+
+        The source frame is loaded once. With ``n_jobs`` > 1 the folds are processed in
+        worker processes, each sent the frame once when it starts, with at most twice
+        as many folds in flight as workers, and the folds are yielded in order. With a
+        ``cache_dir`` each processed fold is saved there, keyed by the source data,
+        ``folds`` and ``kwargs``, and later calls load it instead of processing again.
+
+        Args:
+            folds (optional): The number of folds.
+            n_jobs (optional): The number of folds processed in parallel (-1 for all CPUs).
+            cache_dir (optional): A directory caching the processed folds.
+            **kwargs: Key word arguments for the dataset (e.g. label, processor), copied per fold.
+
+        Yields:
+            A processed dataset per fold.
+
+        """
         df = cls.load()
-        kf = KFold(n_splits=5)
-        for i, indexes in enumerate(kf.split(df)):
-            dataset = cls(**kwargs)
-            train_index, test_index = indexes
-            train_df, test_df = df.iloc[train_index, :], df.iloc[test_index, :]
-            dataset.process(train_df, mode="train")
-            dataset.process(test_df, mode="eval")
-            yield dataset
+        splits = KFold(n_splits=folds).split(df)
+        paths = [None] * folds
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            key = joblib.hash((cls.__module__, cls.__qualname__, df, folds, kwargs))
+            paths = [os.path.join(cache_dir, f"{cls.__name__}-{key}-{i}.joblib") for i in range(folds)]
+        jobs = ((train_index, test_index, path) for (train_index, test_index), path in zip(splits, paths))
+        n_jobs = joblib.effective_n_jobs(n_jobs)
+        if n_jobs == 1:
+            for train_index, test_index, path in jobs:
+                yield _process_fold(cls, df, train_index, test_index, kwargs, path)
+            return
+        executor = ProcessPoolExecutor(min(n_jobs, folds), initializer=_init_worker, initargs=(df,))
+        pending = deque()
+        try:
+            for train_index, test_index, path in jobs:
+                pending.append(executor.submit(_worker_process_fold, cls, train_index, test_index, kwargs, path))
+                if len(pending) >= 2 * n_jobs:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            executor.shutdown(cancel_futures=True)
     
     @classmethod
     def from_training_only(cls, **kwargs):
@@ -69,9 +112,42 @@ class Dataset(Base):
         dataset.test = dataset.train
         return dataset
     
-    def save(self, path, with_data=False):
+    def save(self, path: str, with_data: bool = False, **kwargs):
+        """Saves the dataset, leaving out the train and test data unless ``with_data``.
+
+        Args:
+            path: The path to save to.
+            with_data (optional): Whether to save the train and test data.
+            **kwargs: Key word arguments for Base.save (e.g. compression).
+
+        """
+        dataset = self
         if not with_data:
-            train = None
-            test = None
-        log.info(f"Saving Dataset to Path: {path}")
-        joblib.dump(self, path)
\ No newline at end of file
+            dataset = copy.copy(self)
+            dataset.train = None
+            dataset.test = None
+        Base.save(dataset, path, **kwargs)
+
+
+def _process_fold(cls, df, train_index: np.ndarray, test_index: np.ndarray, kwargs: dict, path: Optional[str]) -> Dataset:
+    if path is not None and os.path.exists(path):
+        log.info(f"Loading cached fold from {path}")
+        return cls.from_pickle(path, mmap_mode="c")
+    # each fold fits its own copy of the processor
+    dataset = cls(**copy.deepcopy(kwargs))
+    dataset.process(df.iloc[train_index, :], mode="train")
+    dataset.process(df.iloc[test_index, :], mode="eval")
+    if path is not None:
+        # written aside and renamed so an interrupted save never leaves a partial fold
+        tmp = f"{path}.{os.getpid()}.tmp"
+        dataset.save(tmp, with_data=True)
+        os.replace(tmp, path)
+    return dataset
+
+
+def _init_worker(df):
+    global _worker_df
+    _worker_df = df
+
+def _worker_process_fold(cls, train_index: np.ndarray, test_index: np.ndarray, kwargs: dict, path: Optional[str]) -> Dataset:
+    return _process_fold(cls, _worker_df, train_index, test_index, kwargs, path)
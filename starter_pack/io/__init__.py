@@ -1,8 +1,30 @@
-from .fetch import AsyncFetch
-from .excel import Excel
+from starter_pack.core.lazy import lazy_attributes
+
+# Submodules pull in aiohttp, openpyxl and xlwings, so they are imported on first access.
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "AsyncFetch": ".fetch",
+    "FetchClient": ".fetch",
+    "FetchError": ".fetch",
+    "AdaptiveLimiter": ".control",
+    "ConcurrencyLimiter": ".control",
+    "FetchStats": ".control",
+    "ResponseCache": ".cache",
+    "MemoryCache": ".cache",
+    "SQLiteCache": ".cache",
+    "Excel": ".excel",
+    "TextExtractor": "starter_pack.utils.text_extractor:TextExtactor"
+})
 
 __all__ = (
     "AsyncFetch",
+    "FetchClient",
+    "FetchError",
+    "AdaptiveLimiter",
+    "ConcurrencyLimiter",
+    "FetchStats",
+    "ResponseCache",
+    "MemoryCache",
+    "SQLiteCache",
     "Excel",
     "TextExtractor"
-)
\ No newline at end of file
+)
@@ -0,0 +1,183 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from typing import Any, Callable, Optional
+
+log = logging.getLogger(__name__)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def normalize_url(url: str) -> str:
+    """Normalizes a url into a cache key.
+
+    The scheme and host are lower cased, default ports and fragments are dropped
+    and query parameters are sorted, so equivalent urls share one key.
+
+    Args:
+        url: A url string.
+
+    Returns:
+        The normalized url.
+
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc += f":{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+class ResponseCache(ABC):
+    """A base class for response caches keyed by normalized url.
+
+    Args:
+        ttl: The number of seconds an entry stays valid. Entries never expire if None.
+        max_entries: The maximum number of entries kept. Unbounded if None.
+        normalize: The function mapping a url (or other lookup string) to its key.
+
+    """
+    def __init__(
+            self, ttl: Optional[float] = None, max_entries: Optional[int] = None, normalize: Callable[[str], str] = normalize_url
+        ):
+        super().__init__()
+        self.ttl = ttl  #: The number of seconds an entry stays valid.
+        self.max_entries = max_entries  #: The maximum number of entries kept.
+        self.normalize = normalize  #: The function mapping a lookup string to its key.
+
+    @abstractmethod
+    def get(self, url: str) -> Optional[Any]:
+        """Returns the cached response for a url, or None if missing or expired."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, url: str, response: Any):
+        """Caches the response for a url."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Persists pending writes and applies eviction."""
+        pass
+
+    def close(self):
+        self.flush()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+
+class MemoryCache(ResponseCache):
+    """An in-process least recently used response cache."""
+    def __init__(
+            self, ttl: Optional[float] = None, max_entries: Optional[int] = None, normalize: Callable[[str], str] = normalize_url
+        ):
+        super().__init__(ttl, max_entries, normalize)
+        self._store: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, url: str) -> Optional[Any]:
+        key = self.normalize(url)
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        created, response = entry
+        if self._expired(created):
+            del self._store[key]
+            return None
+        self._store.move_to_end(key)
+        return response
+
+    def set(self, url: str, response: Any):
+        key = self.normalize(url)
+        self._store[key] = (time.time(), response)
+        self._store.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self._store) > self.max_entries:
+                self._store.popitem(last=False)
+
+    def __len__(self):
+        return len(self._store)
+
+
+class SQLiteCache(ResponseCache):
+    """An on-disk response cache backed by SQLite.
+
+    Responses are stored as json. Writes are committed in batches of ``commit_every``
+    and on ``flush``, when the oldest entries beyond ``max_entries`` are evicted. The
+    connection is guarded by a lock so the cache can be used from a fetch loop thread.
+
+    Args:
+        path: The path of the SQLite database file.
+        ttl: The number of seconds an entry stays valid. Entries never expire if None.
+        max_entries: The maximum number of entries kept. Unbounded if None.
+        normalize: The function mapping a url (or other lookup string) to its key.
+        commit_every: The number of writes between commits.
+
+    """
+    def __init__(
+            self,
+            path: str,
+            ttl: Optional[float] = None,
+            max_entries: Optional[int] = None,
+            normalize: Callable[[str], str] = normalize_url,
+            commit_every: int = 1000
+        ):
+        super().__init__(ttl, max_entries, normalize)
+        self.path = path    #: The path of the SQLite database file.
+        self.commit_every = commit_every    #: The number of writes between commits.
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created REAL, response TEXT)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+        log.info(f"Response cache opened: {path}")
+
+    def get(self, url: str) -> Optional[Any]:
+        key = self.normalize(url)
+        with self._lock:
+            row = self._conn.execute("SELECT created, response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[0]):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+        return json.loads(row[1])
+
+    def set(self, url: str, response: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                (self.normalize(url), time.time(), json.dumps(response))
+            )
+            self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self.ttl is not None:
+                self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
@@ -0,0 +1,195 @@
+import time
+import asyncio
+import bisect
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+log = logging.getLogger(__name__)
+
+#: Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 30, 60, float("inf"))
+
+class FetchStats:
+    """Latency and throughput counters for a fetch run.
+
+    Attributes:
+        requests: The number of HTTP requests made, including retries.
+        retries: The number of retried requests.
+        throttled: The number of 429 responses.
+        errors: The number of failed requests (connection errors, timeouts and error statuses).
+        cached: The number of urls served from the cache.
+        completed: The number of urls with a final result.
+        bytes: The number of response bytes read.
+        histogram: The request counts per bucket of LATENCY_BUCKETS.
+    """
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.errors = 0
+        self.cached = 0
+        self.completed = 0
+        self.bytes = 0
+        self.histogram: List[int] = [0] * len(LATENCY_BUCKETS)
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, latency: float, status: Optional[int] = None, size: int = 0):
+        """Records a request with its latency and HTTP status (None for a connection error)."""
+        self.requests += 1
+        self.bytes += size
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        if status == 429:
+            self.throttled += 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Completed urls per second."""
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, q: float) -> float:
+        """The upper bound of the latency bucket containing the q-th percentile (0 to 100)."""
+        rank = q / 100 * sum(self.histogram)
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.histogram):
+            total += count
+            if count and total >= rank:
+                return bound
+        return 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "completed": self.completed, "cached": self.cached, "requests": self.requests,
+            "retries": self.retries, "throttled": self.throttled, "errors": self.errors,
+            "elapsed": self.elapsed, "throughput": self.throughput,
+            "p50": self.percentile(50), "p90": self.percentile(90), "p99": self.percentile(99)
+        }
+
+    def __repr__(self):
+        return f"FetchStats({self.summary()})"
+
+
+class ConcurrencyLimiter:
+    """A fixed limit on the requests in flight, with a shared pause for Retry-After.
+
+    Args:
+        limit: The maximum number of requests in flight.
+
+    """
+    def __init__(self, limit: int):
+        self.limit: float = limit   #: The current limit on requests in flight.
+        self._paused_until = 0.0
+
+    @property
+    def current(self) -> int:
+        return max(1, int(self.limit))
+
+    def pause(self, seconds: float):
+        """Holds back every new request for the given number of seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def wait(self):
+        """Waits until any pause has elapsed."""
+        delay = self._paused_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._paused_until - time.monotonic()
+
+    def on_success(self, latency: float):
+        pass
+
+    def on_error(self):
+        pass
+
+
+class AdaptiveLimiter(ConcurrencyLimiter):
+    """An AIMD limit on the requests in flight.
+
+    The limit grows by roughly one per round trip while the smoothed latency stays
+    within ``latency_tolerance`` times the baseline (the drifting minimum latency).
+    It shrinks by ``decrease`` when latency rises beyond that, and by ``backoff`` on an
+    error or throttled response, at most once per round trip so a burst of failures
+    from one overloaded period counts once.
+
+    Args:
+        initial: The starting limit.
+        min_limit: The smallest limit.
+        max_limit: The largest limit.
+        latency_tolerance: The latency ratio to the baseline treated as queueing.
+        decrease: The factor applied when latency rises.
+        backoff: The factor applied on an error or throttled response.
+        smoothing: The weight of a new sample in the latency moving average.
+
+    """
+    def __init__(
+            self,
+            initial: int = 10,
+            min_limit: int = 1,
+            max_limit: int = 100,
+            latency_tolerance: float = 2.0,
+            decrease: float = 0.9,
+            backoff: float = 0.5,
+            smoothing: float = 0.2
+        ):
+        super().__init__(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.decrease = decrease
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.baseline: Optional[float] = None   #: The drifting minimum latency.
+        self.latency: Optional[float] = None    #: The smoothed latency.
+        self._last_decrease = 0.0
+
+    def on_success(self, latency: float):
+        self.baseline = latency if self.baseline is None else min(self.baseline * 1.01, latency)
+        self.latency = latency if self.latency is None else (1 - self.smoothing) * self.latency + self.smoothing * latency
+        if self.latency > self.latency_tolerance * self.baseline:
+            self._decrease(self.decrease)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_error(self):
+        self._decrease(self.backoff)
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self._last_decrease >= (self.latency or 0.0):
+            self.limit = max(self.min_limit, self.limit * factor)
+            self._last_decrease = now
+            log.debug(f"Concurrency limit lowered to {self.limit:.1f}")
+
+
+def retry_after(headers: Mapping[str, str], max_delay: float = 300) -> Optional[float]:
+    """Parses a Retry-After header given in seconds or as an HTTP date.
+
+    Args:
+        headers: The response headers.
+        max_delay (optional): The largest delay honoured.
+
+    Returns:
+        The delay in seconds, or None if the header is missing or invalid.
+
+    """
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(delay, 0.0), max_delay)
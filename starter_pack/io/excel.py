@@ -1,51 +1,242 @@
-import xlwings as xw
+import os
+import math
+import itertools
+import tempfile
+import numpy as np
 import pandas as pd
-from typing import Optional
+import openpyxl
+from pandas.api.types import is_numeric_dtype
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string, range_boundaries
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from starter_pack.core.lazy import lazy_import
 import logging
 
 log = logging.getLogger(__name__)
+xw = lazy_import("xlwings")
+
+ENGINES = ("xlwings", "openpyxl")
+
+DType = Union[str, type, Dict[str, Any]]
 
 class Excel:
     """A class for interacting with Excel workbooks
-    
+
+    The ``xlwings`` engine drives a running Excel instance. The ``openpyxl`` engine
+    reads and writes .xlsx files directly, streaming rows in read-only and write-only
+    mode, so it runs without Excel (e.g. on Linux servers) and in bounded memory.
+
     Args:
         file: The file name for the Excel workbook.
+        engine: The engine, either 'xlwings' or 'openpyxl'.
+        chunk_size: The number of rows per chunk read or written by the openpyxl engine.
 
     """
-    def __init__(self, file: str):
+    def __init__(self, file: str, engine: str = "xlwings", chunk_size: int = 100_000):
         super().__init__()
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
         self.file_name = file   #: The file name of the Excel workbook.
-        self.wb = xw.Book(file) #: The xlwings workbook object.
+        self.engine = engine    #: The engine reading and writing the workbook.
+        self.chunk_size = chunk_size    #: The number of rows per chunk for the openpyxl engine.
+        self.wb = xw.Book(file) if engine == "xlwings" else None #: The xlwings workbook object (None for the openpyxl engine).
         log.info(f"Excel File Read: {file}")
 
-    def to_df(self, sheet: str, cell: str = "A1", expand: str = 'table'):
+    def to_df(self, sheet: str, cell: str = "A1", expand: str = 'table', dtype: Optional[DType] = None):
         """Convert an Excel table to a pandas dataframe.
 
         Args:
             sheet: The sheet name of the workbook.
             cell: The table starting range of the table.
             expand: The xlwing expand parameter (e.g. 'table' for table range or 'B10' for a range reference.
+            dtype: The dtype, or a dictionary of dtypes per column, for the openpyxl engine.
 
         Returns:
             A pandas dataframe.
 
         """
-        df = pd.DataFrame(self.wb.sheets(sheet).range(cell).expand(expand).value) 
+        if self.engine == "openpyxl":
+            chunks = list(self._iter_frames(sheet, cell, expand, self.chunk_size))
+            df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+            return df.astype(dtype) if dtype is not None else df
+        df = pd.DataFrame(self.wb.sheets(sheet).range(cell).expand(expand).value)
         headers = df.iloc[0]
         df = pd.DataFrame(df.values[1:], columns=headers)
         return df
 
+    def iter_df(
+            self,
+            sheet: str,
+            cell: str = "A1",
+            expand: str = 'table',
+            chunk_size: Optional[int] = None,
+            dtype: Optional[DType] = None
+        ) -> Iterator[pd.DataFrame]:
+        """Streams an Excel table as dataframes of ``chunk_size`` rows (openpyxl engine).
+
+        The first row of the range is the header. With ``expand='table'`` the table
+        spans the non-empty header cells to the right of ``cell`` and ends at the first
+        empty row; 'down' and 'right' expand a single column or row, and a cell
+        reference (e.g. 'D10') gives the bottom right corner of the range.
+
+        Args:
+            sheet: The sheet name of the workbook.
+            cell: The table starting range of the table.
+            expand: One of 'table', 'down', 'right' or a cell reference.
+            chunk_size: The number of rows per dataframe. Defaults to ``self.chunk_size``.
+            dtype: The dtype, or a dictionary of dtypes per column. Inferred from the first chunk if None.
+
+        Yields:
+            Pandas dataframes with the same dtypes in every chunk.
+
+        Raises:
+            ValueError: if a later chunk cannot be cast to the dtypes of the first (e.g. an
+                integer column with a missing value); pass ``dtype`` in that case.
+
+        """
+        dtypes = None
+        for df in self._iter_frames(sheet, cell, expand, chunk_size or self.chunk_size):
+            if dtypes is None:
+                df = df.astype(dtype) if dtype is not None else df
+                dtypes = df.dtypes
+            else:
+                df = _cast_chunk(df, dtypes, f"{sheet}!{cell}")
+            yield df
+
+    def _iter_frames(self, sheet: str, cell: str, expand: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+        wb = openpyxl.load_workbook(self.file_name, read_only=True, data_only=True)
+        try:
+            rows = _table_rows(wb[sheet], cell, expand)
+            headers = next(rows, None)
+            if headers is None:
+                yield pd.DataFrame()
+                return
+            chunk: List[Tuple[Any, ...]] = []
+            emitted = False
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    yield pd.DataFrame.from_records(chunk, columns=headers)
+                    chunk, emitted = [], True
+            if chunk or not emitted:
+                yield pd.DataFrame.from_records(chunk, columns=headers)
+        finally:
+            wb.close()
+
     def to_excel(self, df: pd.DataFrame, sheet: str, cell: str = "A1", clear_range: Optional[str] = None):
         """Output a pandas DataFrame to an excel range.
 
+        With the openpyxl engine the workbook is rewritten in write-only mode: existing
+        cell values and formulas are copied across row by row, but cell formatting,
+        charts and merged cells are not preserved. The dataframe index is not written.
+
         Args:
             df: A pandas dataframe.
             sheet: The sheet name of the workbook.
             cell: The starting range of the output.
             clear_rage: The range of the workbook to clear before printing (e.g. "A1:D10").
-            
+
         """
+        if self.engine == "openpyxl":
+            self._write_sheet(df, sheet, cell, clear_range)
+            return
         if clear_range is not None:
             self.wb.sheets(sheet).range(clear_range).clear_contents()
-        print_range = self.wb.sheets(sheet).range(cell) 
-        print_range.value = df
\ No newline at end of file
+        print_range = self.wb.sheets(sheet).range(cell)
+        print_range.value = df
+
+    def _write_sheet(self, df: pd.DataFrame, sheet: str, cell: str, clear_range: Optional[str]):
+        source = openpyxl.load_workbook(self.file_name, read_only=True) if os.path.exists(self.file_name) else None
+        target = openpyxl.Workbook(write_only=True)
+        try:
+            names = source.sheetnames if source is not None else []
+            for name in names if sheet in names else names + [sheet]:
+                old_rows = source[name].iter_rows(values_only=True) if name in names else iter(())
+                ws = target.create_sheet(name)
+                if name != sheet:
+                    for row in old_rows:
+                        ws.append(row)
+                    continue
+                for row in _merge_rows(old_rows, _frame_rows(df, self.chunk_size), cell, clear_range):
+                    ws.append(row)
+            fd, tmp = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(os.path.abspath(self.file_name)))
+            os.close(fd)
+            try:
+                target.save(tmp)
+                os.replace(tmp, self.file_name)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        finally:
+            if source is not None:
+                source.close()
+        log.info(f"Excel File Written: {self.file_name} ({sheet}!{cell}, {len(df)} rows)")
+
+
+def _table_rows(ws, cell: str, expand: str) -> Iterator[Tuple[Any, ...]]:
+    col, row = coordinate_from_string(cell)
+    min_col = column_index_from_string(col)
+    if expand in ("table", "down", "right"):
+        max_col = None
+        if expand == "down":
+            max_col = min_col
+        max_row = row if expand == "right" else None
+    else:
+        _, _, max_col, max_row = range_boundaries(f"{cell}:{expand}")
+    rows = ws.iter_rows(min_row=row, max_row=max_row, min_col=min_col, max_col=max_col, values_only=True)
+    first = next(rows, None)
+    if first is None:
+        return
+    if expand in ("table", "right"):
+        width = next((i for i, v in enumerate(first) if v is None), len(first))
+        first = first[:width]
+    else:
+        width = len(first)
+    yield first
+    for values in rows:
+        values = tuple(values[:width]) + (None,) * (width - len(values))
+        if expand in ("table", "down") and all(v is None for v in values):
+            return
+        yield values
+
+
+def _cast_chunk(df: pd.DataFrame, dtypes: pd.Series, table: str) -> pd.DataFrame:
+    """Casts a chunk to the dtypes of the first, refusing casts that change numeric values."""
+    try:
+        cast = df.astype(dtypes)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"A chunk of {table} does not match the dtypes of the first chunk, pass dtype: {e}") from e
+    for i in np.flatnonzero((df.dtypes != dtypes).to_numpy()):
+        old, new = df.iloc[:, i], cast.iloc[:, i]
+        if is_numeric_dtype(old) and is_numeric_dtype(new) and not np.array_equal(old.to_numpy(float), new.to_numpy(float), equal_nan=True):
+            raise ValueError(f"Column {df.columns[i]!r} of {table} has {old.dtype} values in a later chunk than its first {new.dtype} chunk, pass dtype.")
+    return cast
+
+
+def _frame_rows(df: pd.DataFrame, chunk_size: int) -> Iterator[List[Any]]:
+    yield [str(c) for c in df.columns]
+    for start in range(0, len(df), chunk_size):
+        block = df.iloc[start:start + chunk_size].astype(object)
+        for values in block.itertuples(index=False, name=None):
+            yield [None if _is_missing(v) else v for v in values]
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or value is pd.NaT or (isinstance(value, float) and math.isnan(value))
+
+
+def _merge_rows(old_rows, new_rows, cell: str, clear_range: Optional[str]) -> Iterator[List[Any]]:
+    col, start_row = coordinate_from_string(cell)
+    start_col = column_index_from_string(col) - 1
+    clear = range_boundaries(clear_range) if clear_range is not None else None
+    for r, old in enumerate(itertools.chain(old_rows, itertools.repeat(None)), start=1):
+        new = next(new_rows, None) if r >= start_row else None
+        if old is None and new is None and r >= start_row:
+            return
+        values = list(old or ())
+        if clear is not None and clear[1] <= r <= clear[3]:
+            for c in range(clear[0] - 1, min(clear[2], len(values))):
+                values[c] = None
+        if new is not None:
+            values.extend([None] * (start_col + len(new) - len(values)))
+            values[start_col:start_col + len(new)] = new
+        yield values
@@ -1,81 +1,427 @@
 import tqdm
 import json
+import random
 import asyncio
 import aiohttp
+import contextlib
 import logging
+import threading
+import time
 from asyncio_throttle import Throttler
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, AsyncIterable, AsyncIterator, Iterable, Iterator, Optional, Tuple, Union
+from .cache import ResponseCache
+from .control import ConcurrencyLimiter, FetchStats, retry_after
 
 log = logging.getLogger(__name__)
 
 JsonType = Dict[str, Any]
 
+RETRY_STATUS = {429, 500, 502, 503, 504}   #: HTTP statuses that are retried.
+
+class FetchError(Exception):
+    """A failed fetch.
+
+    Returned in place of the json response so that one failed url does not fail the batch.
+
+    Args:
+        url: The url that failed.
+        message: A description of the failure.
+        status (optional): The HTTP status, if a response was received.
+
+    """
+    def __init__(self, url: str, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.url = url  #: The url that failed.
+        self.status = status    #: The HTTP status, if a response was received.
+
+    def __repr__(self):
+        return f"FetchError(url={self.url!r}, status={self.status}, message={str(self)!r})"
+
+FetchResult = Union[JsonType, FetchError]
+
+class FetchClient:
+    """A long-lived aiohttp session that reuses connections across fetch calls.
+
+    Used as a context manager, the client runs its own event loop in a background
+    thread so synchronous callers (e.g. fetch_all) share one connection pool and
+    skip repeated DNS, TCP and TLS handshakes. Used as an async context manager,
+    the session lives on the caller's running event loop instead. One client can
+    be shared by several AsyncFetch instances (e.g. ``Geocoder(key, client=client)``).
+
+    Args:
+        limit (optional): The total connection pool size.
+        limit_per_host (optional): The connection pool limit per host (0 for no limit).
+        keepalive_timeout (optional): The seconds an idle connection is kept alive.
+
+    """
+    def __init__(self, limit: int = 100, limit_per_host: int = 0, keepalive_timeout: float = 15):
+        super().__init__()
+        self.limit = limit  #: The total connection pool size.
+        self.limit_per_host = limit_per_host    #: The connection pool limit per host.
+        self.keepalive_timeout = keepalive_timeout  #: The seconds an idle connection is kept alive.
+        self.loop: Optional[asyncio.AbstractEventLoop] = None   #: The event loop of the session.
+        self.session: Optional[aiohttp.ClientSession] = None    #: The shared session.
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.session is not None and not self.session.closed
+
+    def open(self) -> "FetchClient":
+        """Starts the background event loop and opens the session."""
+        if not self.is_open:
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+            self._thread.start()
+            self.run(self._open_session())
+        return self
+
+    def close(self):
+        """Closes the session and stops the background event loop."""
+        if self._thread is None:
+            return
+        self.run(self._close_session())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        self.loop, self._thread = None, None
+
+    def run(self, coro):
+        """Runs a coroutine on the client's event loop and returns its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def __enter__(self) -> "FetchClient":
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def __aenter__(self) -> "FetchClient":
+        self.loop = asyncio.get_running_loop()
+        await self._open_session()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._close_session()
+        self.loop = None
+
+    def connector(self) -> aiohttp.TCPConnector:
+        return aiohttp.TCPConnector(
+            ssl=False, limit=self.limit, limit_per_host=self.limit_per_host, keepalive_timeout=self.keepalive_timeout
+        )
+
+    async def _open_session(self):
+        self.session = aiohttp.ClientSession(connector=self.connector())
+
+    async def _close_session(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
 class AsyncFetch:
     """ A base class for asyncronus HTTP fetching.
+
+    Args:
+        cache (optional): A response cache. Cached urls are not refetched.
+        retries (optional): The number of retries after a connection error, timeout or
+            retryable status (429 and 5xx).
+        backoff (optional): The base delay in seconds of the jittered exponential backoff.
+            A Retry-After header takes precedence and pauses all new requests.
+        timeout (optional): The total timeout in seconds of each request.
+        client (optional): A FetchClient whose session is reused across calls. Entering
+            AsyncFetch as a (async) context manager opens a client if none is given.
+        limiter (optional): A limiter on the requests in flight (e.g. an AdaptiveLimiter),
+            kept across runs. Defaults to a fixed limit of the fetch window.
+        limit_per_host (optional): The connection pool limit per host (0 for no limit).
+        keepalive_timeout (optional): The seconds an idle connection is kept alive.
+
+    Attributes:
+        stats (FetchStats): The latency histogram and throughput counters of the latest
+            completed run. Each run counts into its own FetchStats, so concurrent streams
+            do not share counters or limiters.
+
     """
 
-    def __init__(self):
+    def __init__(
+            self,
+            cache: Optional[ResponseCache] = None,
+            retries: int = 3,
+            backoff: float = 0.5,
+            timeout: float = 60 * 30,
+            client: Optional[FetchClient] = None,
+            limiter: Optional[ConcurrencyLimiter] = None,
+            limit_per_host: int = 0,
+            keepalive_timeout: float = 15
+        ):
         super().__init__()
+        self.cache = cache  #: The response cache.
+        self.retries = retries  #: The number of retries per request.
+        self.backoff = backoff  #: The base delay of the exponential backoff.
+        self.timeout = aiohttp.ClientTimeout(total=timeout)  #: The timeout of each request.
+        self.client = client    #: The shared FetchClient.
+        self.limiter = limiter  #: The limiter on requests in flight.
+        self.limit_per_host = limit_per_host    #: The connection pool limit per host.
+        self.keepalive_timeout = keepalive_timeout  #: The seconds an idle connection is kept alive.
+        self.stats = FetchStats()
+        self._owns_client = False
 
-    def fetch(self, url: str) -> JsonType:
+    def __enter__(self):
+        if self.client is None:
+            self.client, self._owns_client = self._new_client(), True
+        self.client.open()
+        return self
+
+    def __exit__(self, *exc):
+        if self._owns_client:
+            self.client.close()
+            self.client, self._owns_client = None, False
+
+    async def __aenter__(self):
+        if self.client is None:
+            self.client, self._owns_client = self._new_client(), True
+        await self.client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._owns_client:
+            await self.client.__aexit__(*exc)
+            self.client, self._owns_client = None, False
+
+    def fetch(self, url: str) -> FetchResult:
         """Executes an async fetch.
 
         Args:
             url: A url string.
         
         Returns:
-            A json response object.
+            A json response object, or a FetchError.
 
         """
-        return self.fetch_all([url], rate=None)
+        return self.fetch_all([url], rate=None)[0]
 
-    def fetch_all(self, urls: List[str], rate: Optional[int] = None) -> List[JsonType]:
+    def fetch_all(self, urls: List[str], rate: Optional[int] = None, window: int = 100) -> List[FetchResult]:
         """Executes a throtled async fetch for a list of urls.
 
+        Cached responses are returned without a request and new successful
+        responses are added to the cache. Urls that fail after all retries, or
+        whose response is not json, are returned as a FetchError.
+
         Args:
             urls: A list of url strings.
             rate (optional): The rate to throttle (calls per second).
+            window (optional): The maximum number of requests in flight.
 
         Returns:
-            A list of json responses.
+            A list of json responses or FetchErrors, in the order of urls.
+
+        """
+        responses = [None] * len(urls)
+        for i, response in tqdm.tqdm(self.fetch_iter(urls, rate, window), total=len(urls)):
+            responses[i] = response
+        return responses
+
+    def fetch_iter(
+            self,
+            urls: Iterable[str],
+            rate: Optional[int] = None,
+            window: int = 100,
+            ordered: bool = False
+        ) -> Iterator[Tuple[int, FetchResult]]:
+        """A synchronous wrapper of fetch_stream.
+
+        The stream runs on the event loop of the open FetchClient, or otherwise on a
+        temporary one, in a background thread. This also works where an event loop
+        is already running (e.g. Jupyter).
+
+        Args:
+            urls: An iterable of url strings.
+            rate (optional): The rate to throttle (calls per second).
+            window (optional): The maximum number of requests in flight.
+            ordered (optional): Whether to yield results in the order of urls.
+
+        Yields:
+            The index of the url and its json response or FetchError.
 
         """
-        async def _fetch_all(self, urls: List[str], rate: Optional[int] = None) -> List[JsonType]:
-            connector = aiohttp.TCPConnector(verify_ssl=False, limit=100)
-            throttler = None
-            if rate:
-                throttler = Throttler(rate_limit=rate, period=1)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                tasks = [self._throttler(session, url, throttler, i)  for i, url in enumerate(urls)]
-                responses = [await f for f in tqdm.tqdm(asyncio.as_completed(tasks), total=len(tasks))]
-            responses = sorted(responses, key=lambda x: x[1])
-            responses = list(map(lambda x: x[0], responses))
-            return responses
-            
-        return asyncio.run(_fetch_all(self, urls, rate))
+        temporary = self.client is None or self.client._thread is None
+        client = self._new_client(window).open() if temporary else self.client
+        stream = self.fetch_stream(urls, rate, window, ordered, client)
+        try:
+            while True:
+                try:
+                    yield client.run(stream.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            client.run(stream.aclose())
+            if temporary:
+                client.close()
+
+    async def fetch_stream(
+            self,
+            urls: Union[Iterable[str], AsyncIterable[str]],
+            rate: Optional[int] = None,
+            window: int = 100,
+            ordered: bool = False,
+            client: Optional[FetchClient] = None,
+            stats: Optional[FetchStats] = None
+        ) -> AsyncIterator[Tuple[int, FetchResult]]:
+        """Fetches urls with a bounded in-flight window, yielding results as they complete.
+
+        Urls are pulled from the (async) iterable only when there is room in the
+        window, so memory is bounded by the window rather than the number of urls.
+        When ordered, buffered results count towards the window so a slow url holds
+        back new requests rather than growing the buffer.
+
+        Args:
+            urls: An iterable or async iterable of url strings.
+            rate (optional): The rate to throttle (calls per second).
+            window (optional): The maximum number of requests in flight.
+            ordered (optional): Whether to yield results in the order of urls.
+            client (optional): The FetchClient to use. Defaults to the instance's client.
+                A session is opened for the run if the client is not open on this loop.
+            stats (optional): The FetchStats to count this run into. A new one if None.
+                ``self.stats`` is set to it when the run ends.
+
+        Yields:
+            The index of the url and its json response or FetchError.
+
+        """
+        source = _aiter(urls)
+        throttler = Throttler(rate_limit=rate, period=1) if rate else None
+        stats = stats if stats is not None else FetchStats()
+        limiter = self.limiter if self.limiter is not None else ConcurrencyLimiter(window)
+        in_flight: Dict[asyncio.Future, str] = {}
+        ready: Dict[int, FetchResult] = {}
+        count, next_index, exhausted = 0, 0, False
+        client = client if client is not None else self.client
+        if client is not None and client.is_open and client.loop is asyncio.get_running_loop():
+            session = _shared(client.session)
+        else:
+            session = aiohttp.ClientSession(connector=self._new_client(window).connector())
+        async with session as session:
+            try:
+                while True:
+                    while (
+                        not exhausted
+                        and len(in_flight) < min(window, limiter.current)
+                        and (not ordered or count - next_index < window)
+                    ):
+                        try:
+                            url = await source.__anext__()
+                        except StopAsyncIteration:
+                            exhausted = True
+                            break
+                        response = self.cache.get(url) if self.cache is not None else None
+                        if response is None:
+                            task = asyncio.ensure_future(self._throttler(session, url, throttler, count, stats, limiter))
+                            in_flight[task] = url
+                        else:
+                            ready[count] = response
+                            stats.cached += 1
+                            stats.completed += 1
+                        count += 1
+                    if ordered:
+                        while next_index in ready:
+                            yield next_index, ready.pop(next_index)
+                            next_index += 1
+                    else:
+                        while ready:
+                            yield ready.popitem()
+                    if not in_flight:
+                        if exhausted:
+                            break
+                        continue
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        url = in_flight.pop(task)
+                        response, i = task.result()
+                        ready[i] = response
+                        stats.completed += 1
+                        if self.cache is not None and not isinstance(response, FetchError):
+                            self.cache.set(url, response)
+            finally:
+                for task in in_flight:
+                    task.cancel()
+                await asyncio.gather(*in_flight, return_exceptions=True)
+                if self.cache is not None:
+                    self.cache.flush()
+                stats.finish()
+                self.stats = stats
+                log.info(f"Fetch run: {stats}")
 
     # ------------------------------------------------
     # - Async Handling Functions ---------------------
     # ------------------------------------------------
 
-    async def _fetch(self, session: aiohttp.ClientSession, url: str, i: int) -> JsonType:
-        """A handler to execulte a async HTTP request.
+    async def _fetch(
+            self, session: aiohttp.ClientSession, url: str, i: int, stats: FetchStats, limiter: ConcurrencyLimiter
+        ) -> FetchResult:
+        """A handler to execulte a async HTTP request with retries.
 
         Args:
             session: context for making the http call.
             url: URL to call.
             i: index of fetch.
+            stats: The counters of the run.
+            limiter: The limiter of the run.
 
         Returns:
-            A json response object.
+            A json response object, or a FetchError.
 
         """
-        async with session.get(url, timeout=60*30) as response:
-            resp = await response.read()
-            log.debug(f'Made request: {url}. Status: {response.status}', data=resp)
-            return json.loads(resp), i
+        error, delay = None, None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                stats.retries += 1
+                await asyncio.sleep(delay if delay is not None else self._backoff_delay(attempt))
+            await limiter.wait()
+            start = time.perf_counter()
+            try:
+                async with session.get(url, timeout=self.timeout) as response:
+                    resp = await response.read()
+                    status = response.status
+                    delay = retry_after(response.headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                stats.record(time.perf_counter() - start)
+                limiter.on_error()
+                error, delay = FetchError(url, f"{type(e).__name__}: {e}"), None
+                continue
+            latency = time.perf_counter() - start
+            stats.record(latency, status, len(resp))
+            log.debug(f'Made request: {url}. Status: {status}')
+            if status in RETRY_STATUS:
+                if delay is not None:
+                    limiter.pause(delay)
+                limiter.on_error()
+                error = FetchError(url, f"HTTP {status}", status)
+                continue
+            limiter.on_success(latency)
+            if status >= 400:
+                return FetchError(url, f"HTTP {status}: {resp[:200]!r}", status), i
+            try:
+                return json.loads(resp), i
+            except ValueError as e:
+                return FetchError(url, f"Invalid json: {e}", status), i
+        log.warning(f"Failed after {self.retries + 1} attempts: {error!r}")
+        return error, i
+
+    def _new_client(self, limit: int = 100) -> FetchClient:
+        return FetchClient(limit, self.limit_per_host, self.keepalive_timeout)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """The jittered exponential backoff before a retry."""
+        return self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
 
-    async def _throttler(self, session: aiohttp.ClientSession, url: str, throttler: Throttler, i: int):
+    async def _throttler(
+            self,
+            session: aiohttp.ClientSession,
+            url: str,
+            throttler: Throttler,
+            i: int,
+            stats: FetchStats,
+            limiter: ConcurrencyLimiter
+        ):
         """A throttling wrapper.
 
         Args:
@@ -84,6 +430,8 @@ class AsyncFetch:
             rate: the number of concurrent tasks.
             throttler : asyncio-throttle class.
             i: index of fetch.
+            stats: The counters of the run.
+            limiter: The limiter of the run.
 
         Return:
             The json response object.
@@ -91,7 +439,21 @@ class AsyncFetch:
         """
         if throttler:
             async with throttler:
-                return await self._fetch(session, url, i)
+                return await self._fetch(session, url, i, stats, limiter)
         else:
-            return await self._fetch(session, url, i)
-    
\ No newline at end of file
+            return await self._fetch(session, url, i, stats, limiter)
+
+
+async def _aiter(urls: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[str]:
+    """Iterates an iterable or async iterable of urls asynchronously."""
+    if hasattr(urls, "__aiter__"):
+        async for url in urls:
+            yield url
+    else:
+        for url in urls:
+            yield url
+
+@contextlib.asynccontextmanager
+async def _shared(session: aiohttp.ClientSession):
+    """Enters a shared session without closing it on exit."""
+    yield session
@@ -1,6 +1,23 @@
-from ds.core.base import Base
-import shap
+import logging
+import weakref
+import joblib
+import numpy as np
+import pandas as pd
+from abc import abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from functools import partial
+from typing import Any, Iterable, Iterator, Optional, Tuple, Union
 from sklearn.metrics import mean_absolute_percentage_error, mean_absolute_error, mean_squared_error, r2_score
+from starter_pack.core.base import Base
+from starter_pack.core.lazy import lazy_import
+from starter_pack.models.metrics import STREAMING_METRICS, MetricAccumulator, jackknife_metrics
+from starter_pack.utils.sampling import Sampler
+
+log = logging.getLogger(__name__)
+shap = lazy_import("shap")
+pm = lazy_import("pymc3")
+az = lazy_import("arviz")
 
 METRICS = {
     "r2": r2_score,
@@ -14,11 +31,24 @@ class BaseModel(Base):
     Provides an interface for model training nad predictions
     while implementing shapely values for explanability
     """
+    #: Attributes left out when pickling.
+    _transient = ("_train_key",)
+
     def __init__(self, eval_metric: str):
         self._model = None
         self.metrics = METRICS
         self.eval_metric = eval_metric
         self.loss = METRICS[eval_metric]
+        self._shap_key = None
+        self._train_key = None
+
+    def __getstate__(self):
+        return { key: value for key, value in self.__dict__.items() if key not in self._transient }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for key in self._transient:
+            self.__dict__.setdefault(key, None)
     
     @abstractmethod
     def forward(self, X: np.ndarray):
@@ -28,22 +58,158 @@ class BaseModel(Base):
     def fit(self, X: np.ndarray, y: np.ndarray):
         raise NotImplementedError
         
-    def evaluate(self, X: np.ndarray, y: np.ndarray):
+    def evaluate(self, X: np.ndarray, y: np.ndarray, block_size: Optional[int] = None, n_jobs: int = 1):
+        """Evaluates the metrics on a test set.
+
+        Args:
+            X: The features of the test set.
+            y: The target of the test set.
+            block_size (optional): If given, predictions are made and accumulated over
+                row blocks of this size (see ``evaluate_stream``) instead of all at once.
+            n_jobs (optional): The number of threads evaluating blocks.
+
+        Returns:
+            A dictionary of metric values.
+
+        """
+        if block_size is not None:
+            return self.evaluate_stream(zip(_row_blocks(X, block_size), _row_blocks(y, block_size)), n_jobs)
         yhat = self.forward(X)
         metrics = { k: self.metrics[k](y, yhat) for k, v in self.metrics.items() }
         log.info(metrics)
         return metrics
+
+    def evaluate_stream(self, chunks: Iterable[Tuple[Any, Any]], n_jobs: int = 1):
+        """Evaluates the metrics in one pass over (X, y) chunks.
+
+        Each chunk is predicted and folded into a MetricAccumulator, and the partial
+        accumulators are merged, so data larger than memory or split into partitions
+        gives the same numbers as ``evaluate`` on the full arrays.
+
+        Args:
+            chunks: An iterable of (X, y) chunks.
+            n_jobs (optional): The number of threads evaluating chunks. At most twice as
+                many chunks are read ahead of the ones being evaluated.
+
+        Returns:
+            A dictionary of metric values.
+
+        """
+        unsupported = set(self.metrics) - set(STREAMING_METRICS)
+        if unsupported:
+            raise ValueError(f"Metrics {sorted(unsupported)} cannot be streamed; supported are {STREAMING_METRICS}.")
+        total = MetricAccumulator()
+        n_jobs = joblib.effective_n_jobs(n_jobs)
+        if n_jobs == 1:
+            for X, y in chunks:
+                total.update(y, self.forward(X))
+        else:
+            pending = set()
+            with ThreadPoolExecutor(n_jobs) as executor:
+                try:
+                    for X, y in chunks:
+                        pending.add(executor.submit(_accumulate, self, X, y))
+                        if len(pending) >= 2 * n_jobs:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                total.merge(future.result())
+                    for future in as_completed(pending):
+                        total.merge(future.result())
+                finally:
+                    executor.shutdown(cancel_futures=True)
+        result = total.result()
+        metrics = { k: result[k] for k in self.metrics }
+        log.info(metrics)
+        return metrics
+
+    def evaluate_ci(self,
+            X: np.ndarray,
+            y: np.ndarray,
+            size: int = 1000,
+            alpha: float = 0.05,
+            interval: str = 'percentile',
+            method: str = 'ordinary',
+            sampler: Optional[Sampler] = None
+        ):
+        """Bootstraps confidence intervals for the evaluation metrics.
+
+        Predictions are made once and the (y, yhat) rows are resampled. Every metric is
+        evaluated over a block of resamples at once through sklearn's multioutput support.
+        The BCa jackknife is computed from per-group sums, so it costs one extra pass.
+
+        Args:
+            X: The features of the test set.
+            y: The target of the test set.
+            size (optional): The number of bootstraps to sample.
+            alpha (optional): The significance level (e.g. 0.05 for a 95% interval).
+            interval (optional): The interval method, 'percentile' or 'bca'.
+            method (optional): The bootstrap method (e.g. 'moving' for timeseries).
+            sampler (optional): A Sampler to configure the seed, block size and n_jobs.
+
+        Returns:
+            A dictionary of (lower, upper) bounds for each metric.
+        """
+        yhat = self.forward(X)
+        data = np.column_stack((np.ravel(y), np.ravel(yhat)))
+        sampler = sampler if sampler else Sampler()
+        stat = partial(_metric_stat, metrics=tuple(self.metrics.values()))
+        jackknife = None
+        if set(self.metrics) <= set(STREAMING_METRICS):
+            jackknife = partial(_metric_jackknife, metrics=tuple(self.metrics))
+        low, high = sampler.confidence_interval(data, size, stat, alpha, interval, method, vectorized=True, jackknife=jackknife)
+        return { k: (l, h) for k, l, h in zip(self.metrics, low, high) }
         
     def predict(self, X: np.ndarray):
         return self.forward(X)
     
-    def explain(self, 
-            X_train: np.ndarray, X_test: np.ndarray, nsamples=100, 
-            show_waterfall=True, show_force=True, show_bar=True, show_beeswarm=True
+    def explain(self,
+            X_train: np.ndarray, X_test: np.ndarray, nsamples=100,
+            show_waterfall=True, show_force=True, show_bar=True, show_beeswarm=True,
+            algorithm: str = 'auto',
+            background: int = 100,
+            n_jobs: int = 1,
+            seed: int = 0
         ):
-        X_train, X_test = X_train.sample(nsamples), X_test.sample(nsamples)
-        self.explainer = shap.KernelExplainer(self.predict, X_train, nsamples=nsamples)
-        self.shap_values = self.explainer.shap_values(X_test, nsamples=nsamples)
+        """Computes and plots SHAP values for a sample of the test set.
+
+        With ``algorithm='auto'`` a tree or linear explainer is used when the wrapped
+        estimator supports one, falling back to the model agnostic kernel explainer on a
+        k-means summary of the training set. The test rows are explained in parallel
+        chunks and the values are cached on the model (``shap_values``) until it is
+        refit, so calling ``explain`` again with the same arguments only re-plots. The
+        training set is hashed once by ``fit``, so passing the same object here is free.
+
+        Args:
+            X_train: The training features, used as the background distribution.
+            X_test: The features to explain.
+            nsamples (optional): The number of test rows explained, and of model evaluations
+                per row for the kernel explainer. All rows are explained if None.
+            show_bar (optional): Whether to show the summary plot.
+            algorithm (optional): One of 'auto', 'tree', 'linear' or 'kernel'.
+            background (optional): The number of background rows (k-means centres for the kernel explainer).
+            n_jobs (optional): The number of joblib workers explaining chunks of the test rows.
+            seed (optional): The seed for sampling rows.
+
+        Returns:
+            The SHAP values of the sampled test rows.
+
+        """
+        X_test = _sample_rows(X_test, nsamples, seed)
+        ref, train_hash = getattr(self, "_train_key", None) or (None, None)
+        if ref is None or ref() is not X_train:
+            train_hash = joblib.hash(X_train)
+        key = joblib.hash((train_hash, X_test, algorithm, background, nsamples, seed))
+        if getattr(self, "_shap_key", None) != key:
+            self.explainer = _select_explainer(self, X_train, algorithm, background, seed)
+            kwargs = {"nsamples": nsamples or "auto"} if isinstance(self.explainer, shap.KernelExplainer) else {}
+            n_chunks = max(1, min(joblib.effective_n_jobs(n_jobs), len(X_test)))
+            values = joblib.Parallel(n_jobs=n_jobs)(
+                joblib.delayed(_shap_values)(self.explainer, chunk, kwargs) for chunk in _split_rows(X_test, n_chunks)
+            )
+            self.shap_values = _concat_shap(values)
+            self._shap_key = key
+        else:
+            log.info("Using cached SHAP values.")
         if show_bar:
             shap.summary_plot(self.shap_values, X_test, max_display=500)
         #if show_beeswarm:
@@ -52,6 +218,68 @@ class BaseModel(Base):
             #shap.plots.force(self.explainer.expected_value[0], self.shap_values[0], X_train)
         #if show_waterfall:
             #shap.plots.waterfall(self.explainer.expected_value[0], self.shap_values[0], X_train)
+        return self.shap_values
+
+def _data_key(X) -> Tuple[Optional[weakref.ref], str]:
+    """A weak reference to the training data, when it supports one, and its hash."""
+    try:
+        ref = weakref.ref(X)
+    except TypeError:
+        ref = None
+    return ref, joblib.hash(X)
+
+def _sample_rows(X, n: Optional[int], seed: int):
+    if n is None or len(X) <= n:
+        return X
+    idx = np.sort(np.random.default_rng(seed).choice(len(X), n, replace=False))
+    return X.iloc[idx] if hasattr(X, "iloc") else X[idx]
+
+def _split_rows(X, n: int):
+    bounds = np.linspace(0, len(X), n + 1).astype(int)
+    return [X.iloc[a:b] if hasattr(X, "iloc") else X[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+def _select_explainer(model: "BaseModel", X_train, algorithm: str, background: int, seed: int):
+    """Picks a tree or linear explainer for the wrapped estimator if possible, else a kernel explainer."""
+    if algorithm not in ("auto", "tree", "linear", "kernel"):
+        raise ValueError(f"algorithm must be one of 'auto', 'tree', 'linear' or 'kernel', got {algorithm!r}")
+    estimator = model._model
+    if estimator is not None and algorithm in ("auto", "tree"):
+        try:
+            return shap.TreeExplainer(estimator)
+        except Exception as e:
+            if algorithm == "tree":
+                raise
+            log.debug(f"No tree explainer for {type(estimator).__name__}: {e}")
+    if estimator is not None and algorithm in ("auto", "linear") and hasattr(estimator, "coef_"):
+        try:
+            return shap.LinearExplainer(estimator, _sample_rows(X_train, background, seed))
+        except Exception as e:
+            if algorithm == "linear":
+                raise
+            log.debug(f"No linear explainer for {type(estimator).__name__}: {e}")
+    if algorithm in ("tree", "linear"):
+        raise ValueError(f"A {algorithm} explainer requires a fitted estimator supporting it.")
+    data = shap.kmeans(X_train, background) if len(X_train) > background else X_train
+    return shap.KernelExplainer(model.predict, data)
+
+def _shap_values(explainer, X, kwargs):
+    return explainer.shap_values(X, **kwargs)
+
+def _concat_shap(values):
+    if isinstance(values[0], list):
+        return [np.concatenate(output, axis=0) for output in zip(*values)]
+    return np.concatenate(values, axis=0)
+
+def _metric_stat(samples: np.ndarray, axis: int = 1, metrics=()):
+    """Evaluates metrics over stacked (y, yhat) resamples, treating each resample as an output."""
+    samples = np.moveaxis(samples, axis, 0)
+    y, yhat = samples[..., 0], samples[..., 1]
+    return np.stack([metric(y, yhat, multioutput='raw_values') for metric in metrics], axis=-1)
+
+def _metric_jackknife(data: np.ndarray, labels: np.ndarray, groups: int, metrics=()):
+    """The leave-one-group-out metrics of (y, yhat) rows, stacked like _metric_stat."""
+    result = jackknife_metrics(data[:, 0], data[:, 1], labels, groups)
+    return np.stack([result[k] for k in metrics], axis=-1)
 
 class SKLearnModel(BaseModel):
     """
@@ -65,8 +293,79 @@ class SKLearnModel(BaseModel):
         return self._model.predict(X)
         
     def fit(self, X: np.ndarray, y: np.ndarray):
+        self._shap_key, self._train_key = None, _data_key(X)
         self._model.fit(X, y)
 
+    def predict_batches(self,
+            X: Union[np.ndarray, pd.DataFrame, Iterable],
+            block_size: int = 100_000,
+            n_jobs: int = 1,
+            backend: str = 'thread'
+        ) -> Iterator[np.ndarray]:
+        """Streams predictions over row blocks, optionally on a pool of workers.
+
+        At most two blocks per worker are in flight, so peak memory is bounded by the
+        block size rather than the input size. Threads suit estimators that release the
+        GIL; with ``backend='process'`` the fitted model is sent to each worker once.
+
+        Args:
+            X: An array, a DataFrame or an iterable of array or DataFrame chunks.
+            block_size (optional): The maximum number of rows per block.
+            n_jobs (optional): The number of workers (-1 for one per core).
+            backend (optional): 'thread' or 'process'.
+
+        Yields:
+            The predictions for each block, in input order.
+
+        """
+        if backend not in ("thread", "process"):
+            raise ValueError(f"backend must be 'thread' or 'process', got {backend!r}")
+        blocks = _row_blocks(X, block_size)
+        n_jobs = joblib.effective_n_jobs(n_jobs)
+        if n_jobs == 1:
+            yield from map(self.forward, blocks)
+            return
+        if backend == "thread":
+            executor, predict = ThreadPoolExecutor(n_jobs), self.forward
+        else:
+            executor, predict = ProcessPoolExecutor(n_jobs, initializer=_init_worker, initargs=(self._model,)), _worker_predict
+        pending = deque()
+        try:
+            for block in blocks:
+                pending.append(executor.submit(predict, block))
+                if len(pending) >= 2 * n_jobs:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+
+def _accumulate(model: BaseModel, X, y) -> MetricAccumulator:
+    return MetricAccumulator().update(y, model.forward(X))
+
+def _row_blocks(X, block_size: int) -> Iterator:
+    chunks = [X] if isinstance(X, (np.ndarray, pd.DataFrame, pd.Series)) else X
+    for chunk in chunks:
+        for start in range(0, len(chunk), block_size):
+            yield chunk.iloc[start:start + block_size] if hasattr(chunk, "iloc") else chunk[start:start + block_size]
+
+_worker_model = None
+
+def _thin(trace, thin: int):
+    # a sliced MultiTrace reports (stop - start) // step draws, so the stop is kept a multiple of thin
+    return trace[:len(trace) - len(trace) % thin:thin]
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+def _worker_predict(X):
+    return _worker_model.predict(X)
+
+
+#: The inference methods accepted by PyMC3ModelBase.fit.
+INFERENCE_METHODS = ("nuts", "advi", "fullrank_advi")
 
 class PyMC3ModelBase(BaseModel):
     """
@@ -76,69 +375,243 @@ class PyMC3ModelBase(BaseModel):
         model (pymc3.Model): A PyMC3 model object.
         map: The Maxiumum A Posterior estimate of the parameter values.
         trace: The sampled values from the posterior distributions.
+        approx: The fitted variational approximation when fit with ADVI.
+        trace_path: The netCDF file or zarr store the trace was exported to, if any.
     """
+    #: The names of the data containers holding X and y in the model.
+    X_DATA, Y_DATA = "X_data", "y_data"
+    #: Attributes left out when pickling (the trace only once it has been exported).
+    _transient = BaseModel._transient + ("_inference_data",)
+
     def __init__(self, eval_metric: str):
-        super.__init__(eval_metric)
+        super().__init__(eval_metric)
         self.model = pm.Model()
         self.map = None
         self.trace = None
+        self.approx = None
+        self.trace_path = None
+        self._inference_data = None
+        self._graph_key = None
+        self._y_dtype = None
 
-    def fit(self, X: np.ndarray, y: np.ndarray, samples: int = 1000, tune: int = 1000, **kwargs):
+    def fit(self,
+            X: np.ndarray,
+            y: np.ndarray,
+            samples: int = 1000,
+            tune: int = 1000,
+            inference: str = 'nuts',
+            batch_size: Optional[int] = None,
+            n_iter: int = 50_000,
+            tolerance: float = 1e-3,
+            seed: Optional[int] = None,
+            chains: Optional[int] = None,
+            cores: Optional[int] = None,
+            thin: int = 1,
+            **kwargs
+        ):
         """Defines the PyMC3 model and evaluates the trace and MAP.
 
+        With ``inference='nuts'`` the MAP is found and the posterior sampled with NUTS.
+        With 'advi' or 'fullrank_advi' a variational approximation is fit for up to
+        ``n_iter`` iterations, stopping early once the parameters change by less than
+        ``tolerance``, optionally on minibatches of ``batch_size`` rows, and ``samples``
+        draws from the approximation fill ``trace`` so ``summary`` and the plots work
+        unchanged. ``map`` is then the mean of those draws. Refitting on data with the
+        same number of features swaps it into the existing model instead of redefining it.
+
+        NUTS runs ``chains`` independent chains on ``cores`` processes (PyMC3 picks both
+        from the CPU count if None) and ``samples`` is the number of draws per chain.
+        Keeping every ``thin``-th draw shrinks the trace for highly autocorrelated chains.
+
         Args:
             X: The depedent variables / features.
             y: The independent variable / target.
-            samples (optional): The numper of samples to draw using HMCM.
+            samples (optional): The numper of samples to draw using HMCM (or from the approximation).
             tune (optional): The number of samples to burn-in during HMCM.
-            **kwargs: Additional key word arguements for PyMC3's pm.sample method.
-        
+            inference (optional): One of INFERENCE_METHODS.
+            batch_size (optional): The minibatch size for variational inference. Full batch if None.
+            n_iter (optional): The maximum number of variational iterations.
+            tolerance (optional): The absolute change in the approximation parameters treated as converged.
+            seed (optional): The random seed for sampling, fitting and minibatches.
+            chains (optional): The number of NUTS chains.
+            cores (optional): The number of processes sampling the NUTS chains in parallel.
+            thin (optional): Keep every ``thin``-th draw of the trace, dropping the last ``samples % thin`` draws.
+            **kwargs: Additional key word arguements for PyMC3's pm.sample or pm.fit method.
+
         """
+        if inference not in INFERENCE_METHODS:
+            raise ValueError(f"inference must be one of {INFERENCE_METHODS}, got {inference!r}")
+        if batch_size is not None and inference == "nuts":
+            raise ValueError("Minibatches require a variational inference method ('advi' or 'fullrank_advi').")
+        if (chains is not None or cores is not None) and inference != "nuts":
+            raise ValueError("chains and cores only apply to inference='nuts'.")
+        if not 1 <= thin <= samples:
+            raise ValueError(f"thin must be a positive integer up to samples ({samples}), got {thin}")
+        self._shap_key, self._train_key = None, _data_key(X)
+        self.trace_path, self._inference_data = None, None
+        self._set_data(X, y, total_size=len(X) if batch_size is not None else None)
         with self.model as model:
-            self._definition(model, X, y, **kwargs)
-            self.map = pm.find_MAP()
-            self.trace = pm.sample(samples, tune=tune, progressbar=True, **kwargs)
+            if inference == "nuts":
+                self.approx = None
+                self.map = pm.find_MAP()
+                self.trace = pm.sample(
+                    samples, tune=tune, chains=chains, cores=cores, progressbar=True,
+                    random_seed=seed, return_inferencedata=False, **kwargs
+                )
+                self.trace = _thin(self.trace, thin)
+            else:
+                if batch_size is not None:
+                    # the same seed keeps the X and y minibatch slices aligned
+                    seed_ = 42 if seed is None else seed
+                    kwargs["more_replacements"] = {
+                        model[self.X_DATA]: pm.Minibatch(X, batch_size, random_seed=seed_),
+                        model[self.Y_DATA]: pm.Minibatch(y, batch_size, random_seed=seed_),
+                        **kwargs.get("more_replacements", {})
+                    }
+                convergence = pm.callbacks.CheckParametersConvergence(tolerance=tolerance, diff="absolute")
+                self.approx = pm.fit(n_iter, method=inference, random_seed=seed, callbacks=[convergence], **kwargs)
+                self.trace = _thin(self.approx.sample(samples), thin)
+                self.map = { name: self.trace[name].mean(axis=0) for name in self.trace.varnames }
+                hist = self.approx.hist
+                log.info(f"{inference} stopped after {len(hist)} iterations, loss {hist[-1] if len(hist) else np.nan:.4g}")
         return self
-    
+
+    def _set_data(self, X: np.ndarray, y: np.ndarray, total_size: Optional[int] = None):
+        """Swaps X and y into the model, defining a new graph only when its shape changes.
+
+        The graph depends on the number of features and, for minibatches, the number of
+        rows the likelihood is scaled to, so refitting on data of the same shape (e.g. the
+        folds of a cross-validation) reuses the model definition instead of building it
+        again. pm.sample and pm.fit still compile their functions on every call.
+        """
+        key = (np.shape(X)[1:], total_size)
+        self._y_dtype = np.asarray(y).dtype
+        if self._graph_key == key:
+            pm.set_data({self.X_DATA: X, self.Y_DATA: y}, model=self.model)
+            return
+        self.model = pm.Model()
+        with self.model as model:
+            self._definition(model, X, y, total_size=total_size)
+        self._graph_key = key
+
     @abstractmethod
-    def _definition(self, model, X, y):
+    def _definition(self, model, X, y, total_size: Optional[int] = None):
         """The definition of the PyMC3 model.
 
+        X and y must be registered as ``pm.Data`` containers named ``X_DATA`` and
+        ``Y_DATA`` so they can be swapped for new data or minibatches.
+
         Args:
             model (pymc3.Model): The PyMC3 model to define (e.g. self.model).
             X (np.ndarray): A matrix of the feactures.
             y (np.ndarray): The target vector.
+            total_size (int): The number of rows the likelihood is scaled to when fit on minibatches.
 
         Raises:
             NotImplementedError: must be defined in inherited class.
         """
         raise NotImplementedError
 
-    def forward(self, X, **kwargs):
-        raise NotImplementedError
+    def forward(self, X: np.ndarray, samples: Optional[int] = None, **kwargs):
+        """The posterior predictive mean for new data.
+
+        X is swapped into the fitted model and the posterior predictive draws of ``y``
+        are made for all rows at once. The training data is swapped back afterwards.
+
+        Args:
+            X: The depedent variables / features.
+            samples (optional): The number of posterior predictive draws. One per trace draw if None.
+            **kwargs: Additional key word arguements for pm.sample_posterior_predictive.
+
+        Returns:
+            The mean of the draws for each row.
+
+        """
+        X = np.asarray(X)
+        training = { name: self.model[name].get_value(borrow=True) for name in (self.X_DATA, self.Y_DATA) }
+        # y only sets the shape of the draws, its values are not used
+        pm.set_data({self.X_DATA: X, self.Y_DATA: np.zeros(len(X), dtype=self._y_dtype)}, model=self.model)
+        try:
+            draws = pm.sample_posterior_predictive(self._posterior(), samples=samples, model=self.model, var_names=["y"], progressbar=False, **kwargs)
+        finally:
+            pm.set_data(training, model=self.model)
+        return draws["y"].mean(axis=0)
+
+    def export_trace(self, path: str, compress: bool = True) -> str:
+        """Exports the trace as ArviZ InferenceData to a netCDF file or a zarr store.
+
+        Each variable is stored as a chunked (and, for netCDF, zlib compressed) array.
+        After exporting, ``save`` leaves the trace out of the pickle and the loaded model
+        reads the draws lazily from ``path``, so ``summary`` and the plots only load the
+        variables they use. Paths ending in '.zarr' are written with zarr.
+
+        Args:
+            path: The netCDF file (e.g. 'trace.nc') or zarr store ('trace.zarr').
+            compress (optional): Whether to compress the netCDF variables.
+
+        Returns:
+            The path written.
+
+        """
+        inference_data = self.inference_data
+        if str(path).endswith(".zarr"):
+            inference_data.to_zarr(str(path))
+        else:
+            inference_data.to_netcdf(str(path), compress=compress)
+        self.trace_path = str(path)
+        log.info(f"Trace exported to {path}")
+        return self.trace_path
+
+    @property
+    def inference_data(self):
+        """The posterior as ArviZ InferenceData, read lazily from ``trace_path`` once exported."""
+        if self._inference_data is None:
+            if self.trace is not None:
+                self._inference_data = az.from_pymc3(trace=self.trace, model=self.model)
+            elif self.trace_path is None:
+                raise ValueError("The model must be fit before using the trace.")
+            elif self.trace_path.endswith(".zarr"):
+                self._inference_data = az.InferenceData.from_zarr(self.trace_path)
+            else:
+                with az.rc_context({"data.load": "lazy"}):
+                    self._inference_data = az.from_netcdf(self.trace_path)
+        return self._inference_data
+
+    def _posterior(self):
+        return self.trace if self.trace is not None else self.inference_data
+
+    def __getstate__(self):
+        transient = self._transient + (("trace",) if self.trace_path is not None else ())
+        return { key: value for key, value in self.__dict__.items() if key not in transient }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for key in self._transient + ("trace",):
+            self.__dict__.setdefault(key, None)
 
     def sample_posterior_predictive(self, samples):
-        return pm.sample_posterior_predictive(self.trace, samples=samples, model=self.model)
+        return pm.sample_posterior_predictive(self._posterior(), samples=samples, model=self.model)
 
-    def summary(self):
-        return pm.summary(self.trace)
+    def summary(self, **kwargs):
+        return az.summary(self.inference_data, **kwargs)
 
     def plot_priors(self):
         raise NotImplementedError
 
-    def plot_trace(self):
-        pm.traceplot(self.trace)
+    def plot_trace(self, **kwargs):
+        az.plot_trace(self.inference_data, **kwargs)
 
-    def plot_posterior(self):
-        pm.plot_posterior(self.trace)
+    def plot_posterior(self, **kwargs):
+        az.plot_posterior(self.inference_data, **kwargs)
 
     def plot_graph(self):
         return pm.model_to_graphviz(self.model)
 
-    def plot_autocorr(self):
-        pm.plots.autocorrplot(trace=self.trace)
+    def plot_autocorr(self, **kwargs):
+        az.plot_autocorr(self.inference_data, **kwargs)
     
     def plot_energy(self):
-        bfmi = np.max(pm.stats.bfmi(self.trace))
-        max_gr = max(np.max(gr_stats) for gr_stats in pm.stats.rhat(self.trace).values()).values
-        (pm.energyplot(self.trace, legend=False, figsize=(6, 4)).set_title("BFMI = {}\nGelman-Rubin = {}".format(bfmi, max_gr)))
\ No newline at end of file
+        inference_data = self.inference_data
+        bfmi = np.max(az.bfmi(inference_data))
+        max_gr = max(np.max(gr_stats) for gr_stats in az.rhat(inference_data).values()).values
+        (az.plot_energy(inference_data, legend=False, figsize=(6, 4)).set_title("BFMI = {}\nGelman-Rubin = {}".format(bfmi, max_gr)))
@@ -1 +1,7 @@
-from .bayesian_glm import GLM
\ No newline at end of file
+from starter_pack.core.lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "GLM": ".bayesian_glm",
+    "PosteriorSummary": ".posterior",
+    "predict_posterior": ".posterior"
+})
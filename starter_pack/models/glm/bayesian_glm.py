@@ -2,11 +2,12 @@ import pymc3 as pm
 import numbers
 import numpy as np
 import theano.tensor as tt
-from typing import Dict
-from ds.models.base import PyMC3ModelBase
-from ds.models.glm.families import families
+from typing import Dict, Optional, Sequence, Tuple
+from starter_pack.models.base import PyMC3ModelBase
+from starter_pack.models.glm.families import families
+from starter_pack.models.glm.posterior import PosteriorSummary, predict_posterior
 
-class GLM(PyMC3Model):
+class GLM(PyMC3ModelBase):
     """A bayesian implempentation of Generalized Linear Models.
 
     A GLM is a generalised approach to linear models that can model
@@ -17,6 +18,7 @@ class GLM(PyMC3Model):
         liklihood: A string indicatin the distribution of the liklihood.
         prior: A PyMC3 distribution for the priors over alpha and beta.
         prior_params: The parameters for the priors over alpha and beta.
+        eval_metric: The evaluation metric (e.g. 'mse').
 
     Attributes:
         family (Family): The Family class for the selected likelihood.
@@ -24,23 +26,32 @@ class GLM(PyMC3Model):
         prior_params: The parameters for the priors over alpha and beta.
         
     """
+    _transient = PyMC3ModelBase._transient + ("_draws",)
+
     def __init__(self, 
             likelihood: str, 
             prior = pm.Laplace, 
-            prior_params: Dict[str, float] = { "mu": 0.0,  "b": 1.0 }
+            prior_params: Dict[str, float] = { "mu": 0.0,  "b": 1.0 },
+            eval_metric: str = "mse"
         ):
-        super().__init__()
+        super().__init__(eval_metric)
         assert likelihood in families.keys(), "Likelihood not in expoential family."
         self.family = families[likelihood]
         self.prior = prior
         self.params = prior_params
+        self._draws = None
 
-    def _definition(self, model, X: np.ndarray, y: np.ndarray):
+    def _definition(self, model, X: np.ndarray, y: np.ndarray, total_size: Optional[int] = None):
         # build assertion to check shape of X and y
+        n_features = X.shape[1]
         with model:
+            # Shared data so fit and forward can swap in new rows without redefining the model
+            X_data = pm.Data(self.X_DATA, X)
+            y_data = pm.Data(self.Y_DATA, y)
+
             # Priors for linear regression
             alpha = self.prior('alpha', **self.params)
-            beta = self.prior('beta', shape=(X.shape[1]), **self.params)
+            beta = self.prior('beta', shape=(n_features), **self.params)
 
             # Priors for likelihood family
             priors = {}
@@ -51,6 +62,42 @@ class GLM(PyMC3Model):
                     priors[key] = model.Var(key, val)
 
             # Likelihood Priors
-            yhat = self.family.link(alpha + pm.math.dot(X, beta))
+            yhat = self.family.link(alpha + pm.math.dot(X_data, beta))
             priors[self.family.parent] = yhat
-            self.family.likelihood("y", observed=y, **priors)
\ No newline at end of file
+            self.family.likelihood("y", observed=y_data, total_size=total_size, **priors)
+
+    def predict_posterior(self, X: np.ndarray, quantiles: Optional[Sequence[float]] = None, block_size: Optional[int] = None) -> PosteriorSummary:
+        """Predicts the posterior mean and quantiles of the likelihood parameter in NumPy.
+
+        This scores ``link(alpha + X @ beta.T)`` against every draw in the trace with
+        blocked matrix products, which is much faster than ``forward`` for large X.
+        It summarises the predicted parameter (e.g. p or mu), not the predictive
+        distribution of y, so the quantiles are credible intervals for the mean.
+
+        Args:
+            X: The depedent variables / features.
+            quantiles (optional): The quantiles between 0 and 1 to return (e.g. [0.05, 0.95]).
+            block_size (optional): The number of rows scored at a time.
+
+        Returns:
+            A PosteriorSummary with the mean and the quantiles of each row.
+
+        """
+        if self.family.np_link is None:
+            raise NotImplementedError(f"{self.family.__name__} has no NumPy link for posterior predictions.")
+        alpha, beta = self._posterior_draws()
+        return predict_posterior(X, alpha, beta, self.family.np_link, quantiles, block_size)
+
+    def _posterior_draws(self) -> Tuple[np.ndarray, np.ndarray]:
+        # extracted once per trace, the source is kept to detect refits
+        source = self._posterior()
+        if self._draws is None or self._draws[0] is not source:
+            if self.trace is not None:
+                alpha, beta = np.asarray(self.trace["alpha"]), np.asarray(self.trace["beta"])
+            else:
+                # only alpha and beta are read from an exported trace
+                posterior = source.posterior
+                alpha = posterior["alpha"].values.reshape(-1)
+                beta = posterior["beta"].values.reshape(len(alpha), -1)
+            self._draws = (source, alpha, beta)
+        return self._draws[1:]
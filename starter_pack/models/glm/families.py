@@ -12,12 +12,14 @@ class Family:
     """Base class for distributions from the exponential family
     """
     link = None         #: Mean link function
+    np_link = None      #: Name of the NumPy link in posterior.LINKS (None if unsupported)
     likelihood = None   #: Likelihood distribution
     parent = None       #: Likelihood parameter predicted by GLM
     priors = {}         #: Likelihood priors
 
 class Normal(Family):
     link = identity
+    np_link = "identity"
     likelihood = pm.Normal
     parent = "mu"
     priors = {
@@ -26,6 +28,7 @@ class Normal(Family):
 
 class LogNormal(Family):
     link = exp
+    np_link = "exp"
     likelihood = pm.Normal
     parent = "mu"
     priors = {
@@ -34,6 +37,7 @@ class LogNormal(Family):
 
 class StudentT(Family):
     link = identity
+    np_link = "identity"
     likelihood = pm.StudentT
     parent = "mu"
     priors = { 
@@ -43,11 +47,13 @@ class StudentT(Family):
 
 class Bernoulli(Family):
     link = sigmoid
+    np_link = "sigmoid"
     likelihood = pm.Bernoulli
     parent = "p"
 
 class Binomial(Family):
     link = sigmoid
+    np_link = "sigmoid"
     likelihood = pm.Binomial
     parent = "p"
     priors = {
@@ -61,6 +67,7 @@ class Categorical(Family):
 
 class Poisson(Family):
     link = exp
+    np_link = "exp"
     likelihood = pm.Poisson
     parent = "mu"
     priors = {
@@ -69,6 +76,7 @@ class Poisson(Family):
 
 class NegativeBinomial(Family):
     link = exp
+    np_link = "exp"
     likelihood = pm.NegativeBinomial
     parent = "mu"
     priors = {
@@ -78,6 +86,7 @@ class NegativeBinomial(Family):
 
 class Gamma(Family):
     link = exp
+    np_link = "exp"
     likelihood = pm.Gamma
     parent = "mu"
     priors = {
@@ -0,0 +1,72 @@
+"""Posterior mean and quantile predictions for GLMs from parameter draws in NumPy"""
+import numpy as np
+from scipy.special import expit
+from typing import NamedTuple, Optional, Sequence
+
+#: The NumPy inverse link functions, keyed by the ``np_link`` names of the GLM families.
+LINKS = {
+    "identity": None,
+    "exp": np.exp,
+    "sigmoid": expit
+}
+
+class PosteriorSummary(NamedTuple):
+    """The posterior mean and quantiles of the predicted parameter for each row."""
+    mean: np.ndarray
+    quantiles: Optional[np.ndarray]
+
+
+def predict_posterior(
+        X: np.ndarray,
+        alpha: np.ndarray,
+        beta: np.ndarray,
+        link: str = "identity",
+        quantiles: Optional[Sequence[float]] = None,
+        block_size: Optional[int] = None,
+        max_elements: int = 2**18
+    ) -> PosteriorSummary:
+    """Summarises ``link(alpha + X @ beta.T)`` over the posterior draws of a GLM.
+
+    Rows are scored in blocks, each as one matrix product against all the draws, so
+    memory is bounded by ``block_size`` x draws values whatever the number of rows.
+    Only the rows are blocked, as the quantiles of a row need all of its draws at once.
+    Without quantiles and with the identity link the mean is linear in the draws, so
+    it is computed from the mean of alpha and beta directly.
+
+    Args:
+        X: The features, one row per prediction.
+        alpha: The intercept draws, shape (draws,).
+        beta: The coefficient draws, shape (draws, features).
+        link (optional): One of LINKS.
+        quantiles (optional): The quantiles between 0 and 1 to return (e.g. [0.05, 0.95]).
+        block_size (optional): The number of rows per block. Sized to ``max_elements`` if None.
+        max_elements (optional): The largest block of rows x draws held in memory when ``block_size`` is None.
+
+    Returns:
+        The mean for each row and, if requested, the quantiles with shape (len(quantiles), rows).
+
+    """
+    if link not in LINKS:
+        raise ValueError(f"link must be one of {tuple(LINKS)}, got {link!r}")
+    X = np.asarray(X)
+    alpha = np.ravel(np.asarray(alpha))
+    beta = np.asarray(beta).reshape(len(alpha), -1)
+    if X.ndim != 2 or X.shape[1] != beta.shape[1]:
+        raise ValueError(f"X must have {beta.shape[1]} columns, got shape {X.shape}")
+    inverse_link = LINKS[link]
+    if inverse_link is None and quantiles is None:
+        return PosteriorSummary(alpha.mean() + X @ beta.mean(axis=0), None)
+    block_size = block_size or max(1, max_elements // len(alpha))
+    dtype = np.result_type(X, beta)
+    mean = np.empty(len(X), dtype=dtype)
+    bounds = np.empty((len(quantiles), len(X)), dtype=dtype) if quantiles is not None else None
+    for start in range(0, len(X), block_size):
+        stop = min(start + block_size, len(X))
+        eta = X[start:stop] @ beta.T
+        eta += alpha
+        if inverse_link is not None:
+            inverse_link(eta, out=eta)
+        mean[start:stop] = eta.mean(axis=1)
+        if bounds is not None:
+            bounds[:, start:stop] = np.quantile(eta, quantiles, axis=1)
+    return PosteriorSummary(mean, bounds)
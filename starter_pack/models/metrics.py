@@ -0,0 +1,120 @@
+"""Streaming regression metrics that can be updated chunk by chunk and merged"""
+import numpy as np
+from typing import Dict
+
+#: The metrics computed by MetricAccumulator.
+STREAMING_METRICS = ("r2", "mse", "mape", "mae")
+
+_EPS = np.finfo(np.float64).eps
+
+class MetricAccumulator:
+    """Accumulates r2, mse, mape and mae over chunks of (y, yhat) in one pass.
+
+    The target mean and sum of squares are combined with Chan's parallel update, so
+    accumulators built over separate partitions merge to the same result as one pass
+    over all the data, which matches the sklearn metrics on the full arrays.
+
+    Attributes:
+        n: The number of observations.
+        mean: The mean of the target.
+        m2: The sum of squared deviations of the target from its mean.
+        sse: The sum of squared errors.
+        sae: The sum of absolute errors.
+        sape: The sum of absolute percentage errors (relative to max(|y|, eps) as in sklearn).
+    """
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sse = 0.0
+        self.sae = 0.0
+        self.sape = 0.0
+
+    def update(self, y: np.ndarray, yhat: np.ndarray) -> "MetricAccumulator":
+        """Adds a chunk of targets and predictions."""
+        y = np.ravel(np.asarray(y, dtype=np.float64))
+        yhat = np.ravel(np.asarray(yhat, dtype=np.float64))
+        if len(y) != len(yhat):
+            raise ValueError(f"y and yhat have different lengths: {len(y)} and {len(yhat)}")
+        if len(y) == 0:
+            return self
+        error = np.abs(y - yhat)
+        chunk = MetricAccumulator()
+        chunk.n = len(y)
+        chunk.mean = y.mean()
+        chunk.m2 = np.sum((y - chunk.mean) ** 2)
+        chunk.sse = np.dot(error, error)
+        chunk.sae = error.sum()
+        chunk.sape = np.sum(error / np.maximum(np.abs(y), _EPS))
+        return self.merge(chunk)
+
+    def merge(self, other: "MetricAccumulator") -> "MetricAccumulator":
+        """Combines the counts of another accumulator into this one."""
+        n = self.n + other.n
+        if n == 0:
+            return self
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta ** 2 * self.n * other.n / n
+        self.n = n
+        self.sse += other.sse
+        self.sae += other.sae
+        self.sape += other.sape
+        return self
+
+    def __add__(self, other: "MetricAccumulator") -> "MetricAccumulator":
+        return MetricAccumulator().merge(self).merge(other)
+
+    def result(self) -> Dict[str, float]:
+        """Returns the metrics over everything accumulated."""
+        if self.n == 0:
+            raise ValueError("No observations have been accumulated.")
+        if self.m2 > 0:
+            r2 = 1 - self.sse / self.m2
+        else:
+            r2 = 1.0 if self.sse == 0 else 0.0
+        return {
+            "r2": float(r2),
+            "mse": float(self.sse / self.n),
+            "mape": float(self.sape / self.n),
+            "mae": float(self.sae / self.n)
+        }
+
+    def __repr__(self):
+        return f"MetricAccumulator(n={self.n})"
+
+
+def jackknife_metrics(y: np.ndarray, yhat: np.ndarray, labels: np.ndarray, groups: int) -> Dict[str, np.ndarray]:
+    """Evaluates the metrics with each group of rows left out in turn.
+
+    Every metric is a function of a few sums, so the leave-one-group-out values are the
+    totals minus per-group sums. That is one pass over the data for all groups instead
+    of one pass per group.
+
+    Args:
+        y: The target.
+        yhat: The predictions.
+        labels: The group of each row, from 0 to ``groups`` - 1.
+        groups: The number of groups.
+
+    Returns:
+        An array of the metric with each group left out, for each of STREAMING_METRICS.
+
+    """
+    y = np.ravel(np.asarray(y, dtype=np.float64))
+    yhat = np.ravel(np.asarray(yhat, dtype=np.float64))
+    error = np.abs(y - yhat)
+    # centring the target limits cancellation in the sum of squares
+    centred = y - y.mean()
+
+    def left_out(values: np.ndarray) -> np.ndarray:
+        return values.sum() - np.bincount(labels, weights=values, minlength=groups)
+
+    n = len(y) - np.bincount(labels, minlength=groups)
+    sum_y, sum_yy = left_out(centred), left_out(centred ** 2)
+    sse, sae = left_out(error ** 2), left_out(error)
+    sape = left_out(error / np.maximum(np.abs(y), _EPS))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m2 = sum_yy - sum_y ** 2 / n
+        r2 = np.where(m2 > 0, 1 - sse / m2, np.where(sse == 0, 1.0, 0.0))
+        return {"r2": r2, "mse": sse / n, "mape": sape / n, "mae": sae / n}
@@ -0,0 +1,228 @@
+"""An async micro-batching front end for serving BaseModel predictions"""
+import time
+import asyncio
+import logging
+import numpy as np
+import pandas as pd
+from collections import deque
+from aiohttp import web
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+class ServingStats:
+    """Queue depth, batch size and latency counters for a MicroBatcher.
+
+    Args:
+        window: The number of most recent request latencies kept for percentiles.
+
+    Attributes:
+        requests: The number of completed requests.
+        errors: The number of requests that failed.
+        batches: The number of predict calls.
+        max_queue_depth: The largest number of requests waiting for a batch.
+    """
+    def __init__(self, window: int = 10_000):
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.latencies: deque = deque(maxlen=window)
+        self.started = time.perf_counter()
+
+    def enqueued(self, depth: int):
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def record_batch(self, latencies: Sequence[float], failed: bool = False):
+        """Records a predict call and the end-to-end latency of each request in it."""
+        self.batches += 1
+        self.requests += len(latencies)
+        self.errors += len(latencies) if failed else 0
+        self.latencies.extend(latencies)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Completed requests per second."""
+        return self.requests / (time.perf_counter() - self.started)
+
+    def percentile(self, q: float) -> float:
+        """The q-th percentile (0 to 100) of recent request latencies in seconds."""
+        return float(np.percentile(self.latencies, q)) if self.latencies else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests, "errors": self.errors, "batches": self.batches,
+            "mean_batch_size": self.mean_batch_size, "max_queue_depth": self.max_queue_depth,
+            "throughput": self.throughput,
+            "p50": self.percentile(50), "p90": self.percentile(90), "p99": self.percentile(99)
+        }
+
+    def __repr__(self):
+        return f"ServingStats({self.summary()})"
+
+
+class MicroBatcher:
+    """Groups single-row prediction requests into batches for one predict call each.
+
+    Requests are queued and a batch is flushed when ``max_batch_size`` rows are waiting
+    or the oldest has waited ``max_wait`` seconds. Each batch is predicted on a worker
+    thread so the event loop keeps accepting requests, and the results (or the error)
+    are scattered back to the callers.
+
+    Args:
+        model: A fitted model with a ``predict`` method (e.g. a BaseModel).
+        max_batch_size (optional): The largest number of rows per predict call.
+        max_wait (optional): The longest a request waits for its batch to fill, in seconds.
+        columns (optional): Column names used to build a DataFrame from list rows. Rows
+            given as dicts always build a DataFrame; otherwise rows are stacked into an array.
+
+    """
+    def __init__(self, model, max_batch_size: int = 64, max_wait: float = 0.005, columns: Optional[List[str]] = None):
+        self.model = model
+        self.max_batch_size = max_batch_size    #: The largest number of rows per predict call.
+        self.max_wait = max_wait    #: The longest a request waits for its batch to fill.
+        self.columns = columns  #: Column names for list rows.
+        self.stats = ServingStats()  #: The serving counters.
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._has_items: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of requests waiting for a batch."""
+        return len(self._pending)
+
+    async def start(self):
+        """Starts the batching loop on the running event loop."""
+        if self._task is None:
+            self._has_items, self._full = asyncio.Event(), asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the batching loop, failing any queued requests."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for _, future, _ in self._pending:
+            if not future.done():
+                future.set_exception(RuntimeError("MicroBatcher stopped."))
+        self._pending.clear()
+
+    async def predict(self, row: Any) -> Any:
+        """Queues one row and returns its prediction once its batch has been predicted."""
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future, time.perf_counter()))
+        self.stats.enqueued(len(self._pending))
+        self._has_items.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._has_items.wait()
+            timeout = self._pending[0][2] + self.max_wait - time.perf_counter()
+            if len(self._pending) < self.max_batch_size and timeout > 0:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+            if not self._pending:
+                self._has_items.clear()
+            rows, futures, started = zip(*batch)
+            try:
+                predictions = await loop.run_in_executor(None, self.model.predict, self._stack(rows))
+                if len(predictions) != len(rows):
+                    raise ValueError(f"predict returned {len(predictions)} results for {len(rows)} rows")
+            except asyncio.CancelledError:
+                for future in futures:
+                    future.cancel()
+                raise
+            except Exception as e:
+                log.error(f"Batch of {len(rows)} failed: {e!r}")
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                failed = True
+            else:
+                for future, prediction in zip(futures, predictions):
+                    if not future.done():
+                        future.set_result(prediction)
+                failed = False
+            now = time.perf_counter()
+            self.stats.record_batch([now - t for t in started], failed)
+
+    def _stack(self, rows: Sequence[Any]):
+        if isinstance(rows[0], dict) or self.columns is not None:
+            return pd.DataFrame(list(rows), columns=self.columns)
+        return np.asarray(rows)
+
+
+def create_app(batcher: MicroBatcher) -> web.Application:
+    """Builds an aiohttp application serving a MicroBatcher.
+
+    ``POST /predict`` takes one row as a json list of features or an object of
+    column values and returns ``{"prediction": ...}``. ``GET /stats`` returns the
+    serving counters, latency percentiles and the current queue depth.
+
+    Args:
+        batcher: The micro-batcher wrapping the model.
+
+    Returns:
+        The aiohttp application.
+
+    """
+    async def predict(request: web.Request) -> web.Response:
+        try:
+            row = await request.json()
+        except ValueError:
+            return web.json_response({"error": "The body must be a json row."}, status=400)
+        try:
+            prediction = await batcher.predict(row)
+        except Exception as e:
+            return web.json_response({"error": repr(e)}, status=500)
+        return web.json_response({"prediction": np.asarray(prediction).tolist()})
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response({**batcher.stats.summary(), "queue_depth": batcher.queue_depth})
+
+    async def on_startup(app: web.Application):
+        await batcher.start()
+
+    async def on_cleanup(app: web.Application):
+        await batcher.stop()
+
+    app = web.Application()
+    app.router.add_post("/predict", predict)
+    app.router.add_get("/stats", stats)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def serve(model, host: str = "0.0.0.0", port: int = 8080, **kwargs):
+    """Serves a model with micro-batching until interrupted.
+
+    Args:
+        model: A fitted model with a ``predict`` method.
+        host (optional): The interface to bind.
+        port (optional): The port to listen on.
+        **kwargs: Key word arguments for MicroBatcher (e.g. max_batch_size, max_wait).
+
+    """
+    web.run_app(create_app(MicroBatcher(model, **kwargs)), host=host, port=port)
@@ -1,2 +1,3 @@
-from .sarimax import SARIMAX
-from .linear_model import LinearTimeseriesModel
+from starter_pack.core.lazy import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {"SARIMAX": ".sarimax", "LinearTimeseriesModel": ".linear_model"})
@@ -1,49 +1,209 @@
-import matplotlib.pyplot as plt
+import importlib
+import warnings
+import joblib
 import numpy as np
-from statsmodels.tsa.stattools import adfuller
+import pandas as pd
+from scipy.fft import next_fast_len
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from starter_pack.core.lazy import lazy_import
+
+plt = lazy_import("matplotlib.pyplot")
+stattools = lazy_import("statsmodels.tsa.stattools")
+
+Lags = Union[int, Tuple[int, int], Sequence[int], None]
 
 def check_stationary(y: np.ndarray, alpha: float = 0.05):
-    result = adfuller(y)
+    result = stattools.adfuller(y)
     print('ADF Statistic: %f' % result[0])
     print('p-value: %f' % result[1])
     for key, value in result[4].items():
         print('\t%s: %.3f' % (key, value))
     return result[1] <= alpha
 
+def check_stationary_all(
+        df: pd.DataFrame,
+        alpha: float = 0.05,
+        kpss: bool = False,
+        max_diff: int = 2,
+        regression: str = 'c',
+        autolag: Optional[str] = 'AIC',
+        n_jobs: int = -1,
+        chunk_size: int = 256
+    ) -> pd.DataFrame:
+    """Screens every column of a DataFrame for stationarity in parallel.
+
+    Each series is differenced until the ADF test rejects a unit root (and, with
+    ``kpss``, the KPSS test fails to reject stationarity) or ``max_diff`` is reached.
+    NaNs are dropped per series, so ragged series can share one frame. Columns are
+    dispatched to joblib workers in chunks and nothing is printed.
+
+    Args:
+        df: A DataFrame with one series per column.
+        alpha (optional): The significance level of the tests.
+        kpss (optional): Whether to confirm the ADF result with a KPSS test.
+        max_diff (optional): The largest differencing order to try.
+        regression (optional): The deterministic terms of the tests ('c' or 'ct').
+        autolag (optional): The ADF lag selection criterion.
+        n_jobs (optional): The number of joblib workers.
+        chunk_size (optional): The number of series sent to a worker per task.
+
+    Returns:
+        A DataFrame indexed by series with the differencing order, whether the series is
+        stationary at that order, the test statistics and p-values, and any error message.
+
+    """
+    values = df.to_numpy(dtype=float)
+    chunks = [slice(i, i + chunk_size) for i in range(0, values.shape[1], chunk_size)]
+    results = joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(_stationarity_chunk)(values[:, c], alpha, kpss, max_diff, regression, autolag)
+        for c in chunks
+    )
+    results = pd.DataFrame([row for chunk in results for row in chunk], index=df.columns)
+    results.index.name = 'series'
+    return results
+
+def _stationarity_chunk(values: np.ndarray, *args) -> List[Dict[str, Any]]:
+    # importing statsmodels resets its warning filters, so it must happen before they are silenced
+    importlib.import_module("statsmodels.tsa.stattools")
+    with warnings.catch_warnings():
+        # KPSS warns whenever the statistic is outside its p-value lookup table
+        warnings.simplefilter('ignore')
+        return [_stationarity_order(values[:, j], *args) for j in range(values.shape[1])]
+
+def _stationarity_order(
+        y: np.ndarray, alpha: float, kpss: bool, max_diff: int, regression: str, autolag: Optional[str]
+    ) -> Dict[str, Any]:
+    y = y[~np.isnan(y)]
+    stats = {'adf_stat': np.nan, 'adf_pvalue': np.nan, 'adf_lags': np.nan, 'kpss_stat': np.nan, 'kpss_pvalue': np.nan}
+    result = {'diff_order': 0, 'stationary': False, 'n_obs': len(y), **stats, 'error': None}
+    for d in range(max_diff + 1):
+        if len(y) == 0 or np.all(y == y[0]):
+            result.update(stats, diff_order=d, error="The series has no observations." if len(y) == 0 else "The series is constant.")
+            break
+        # the stats of an order are only reported once all its tests have run
+        try:
+            adf_stat, adf_pvalue, adf_lags = stattools.adfuller(y, regression=regression, autolag=autolag)[:3]
+            order = dict(stats, adf_stat=adf_stat, adf_pvalue=adf_pvalue, adf_lags=adf_lags)
+            stationary = adf_pvalue <= alpha
+            if kpss:
+                kpss_stat, kpss_pvalue = stattools.kpss(y, regression=regression, nlags='auto')[:2]
+                order.update(kpss_stat=kpss_stat, kpss_pvalue=kpss_pvalue)
+                stationary = stationary and kpss_pvalue > alpha
+        except Exception as e:
+            # one failing series is reported in its row rather than aborting the batch
+            result.update(stats, diff_order=d, error=f"{type(e).__name__}: {e}")
+            break
+        result.update(order, diff_order=d, stationary=stationary)
+        if stationary:
+            break
+        y = np.diff(y)
+    return result
+
+def lagged_cross_corr(
+        x, y, lags: Lags = None, wrap: bool = False, pairwise: bool = False, min_periods: int = 2
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """Computes the normalised lag-N cross correlation of two series with an FFT.
+
+    For every lag the result matches ``x.corr(y.shift(lag))`` in pandas: the Pearson r
+    over the overlapping observations, with NaNs excluded pairwise. The moment sums for
+    all lags are evaluated as six FFT cross correlations, so the cost is O(N log N)
+    rather than O(L·N) for L lags.
+
+    Args:
+        x: A series or a batch of series with time along the last axis. A DataFrame is
+            treated as one series per column.
+        y: A series or batch of series broadcastable against x.
+        lags (optional): An int for the symmetric window [-lags, lags], a (min, max) tuple
+            (inclusive) or a sequence of lags. Defaults to every lag.
+        wrap (optional): Whether to shift circularly rather than padding with NaNs.
+        pairwise (optional): Whether to correlate every series in x with every series in y
+            (e.g. a matrix of sensor channels) rather than elementwise.
+        min_periods (optional): The minimum number of overlapping observations for a valid result.
+
+    Returns:
+        The lags and the correlations, with shape (..., n_lags) or (n_x, n_y, n_lags)
+        when pairwise.
+
+    """
+    x, y = _as_series_array(x), _as_series_array(y)
+    n = x.shape[-1]
+    if y.shape[-1] != n:
+        raise ValueError("x and y must have the same length along the time axis.")
+    lags = _lag_range(lags, n, wrap)
+
+    mx, my = ~np.isnan(x), ~np.isnan(y)
+    x, y = _demean(x, mx), _demean(y, my)
+    nfft = n if wrap else next_fast_len(2 * n - 1, real=True)
+    fx = [np.fft.rfft(a, nfft, axis=-1) for a in (mx.astype(float), x, x * x)]
+    fy = [np.fft.rfft(a, nfft, axis=-1) for a in (my.astype(float), y, y * y)]
+    if pairwise:
+        fx = [f[..., :, None, :] for f in fx]
+        fy = [f[..., None, :, :] for f in fy]
+
+    def xcorr(a, b):
+        return np.fft.irfft(a * np.conj(b), nfft, axis=-1)[..., lags % nfft]
+
+    count = np.rint(xcorr(fx[0], fy[0]))
+    sx, sy = xcorr(fx[1], fy[0]), xcorr(fx[0], fy[1])
+    sxx, syy = xcorr(fx[2], fy[0]), xcorr(fx[0], fy[2])
+    sxy = xcorr(fx[1], fy[1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vx = sxx - sx * sx / count
+        vy = syy - sy * sy / count
+        r = (sxy - sx * sy / count) / np.sqrt(vx * vy)
+    # FFT round-off leaves ~1e-16 relative noise; treat that as zero variance
+    tol = 1e-10
+    invalid = (count < min_periods) | (vx <= tol * fx[2][..., :1].real) | (vy <= tol * fy[2][..., :1].real)
+    r[invalid] = np.nan
+    return lags, np.clip(r, -1.0, 1.0)
+
+def _as_series_array(a) -> np.ndarray:
+    if isinstance(a, pd.DataFrame):
+        return a.to_numpy(dtype=float).T
+    return np.asarray(a, dtype=float)
+
+def _demean(a: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Centres each series on its mean (which leaves r unchanged but limits cancellation) and zeros NaNs."""
+    a = np.where(mask, a, 0.0)
+    count = np.maximum(mask.sum(axis=-1, keepdims=True), 1)
+    return np.where(mask, a - a.sum(axis=-1, keepdims=True) / count, 0.0)
+
+def _lag_range(lags: Lags, n: int, wrap: bool) -> np.ndarray:
+    if lags is None:
+        lags = np.arange(-(n - 1), n)
+    elif np.isscalar(lags):
+        lags = np.arange(-int(lags), int(lags) + 1)
+    elif isinstance(lags, tuple) and len(lags) == 2:
+        lags = np.arange(lags[0], lags[1] + 1)
+    else:
+        lags = np.asarray(lags, dtype=int)
+    if not wrap and np.any(np.abs(lags) >= n):
+        raise ValueError(f"Lags must be within ({-n}, {n}) for series of length {n}.")
+    return lags
+
 # check if leading or lagging
 # https://towardsdatascience.com/four-ways-to-quantify-synchrony-between-time-series-data-b99136c4a9c9
-def plot_time_lagged_cross_corr(d1, d2):
+def plot_time_lagged_cross_corr(d1, d2, max_lag: int = 150, wrap: bool = False, ax: Optional["plt.Axes"] = None):
     """
     Checks whether or not one series is leading or lagging the other.
+
+    Args:
+        d1, d2: The series to compare.
+        max_lag (optional): The largest lag (in frames) either side of zero.
+        wrap (optional): Whether to shift circularly rather than padding with NaNs.
+        ax (optional): The axes to draw on. A new figure is created if not provided.
+
+    Returns:
+        The offset of peak synchrony in frames.
     """
-    def crosscorr(datax, datay, lag=0, wrap=False):
-        """ Lag-N cross correlation. 
-        Shifted data filled with NaNs 
-        
-        Parameters
-        ----------
-        lag : int, default 0
-        datax, datay : pandas.Series objects of equal length
-        Returns
-        ----------
-        crosscorr : float
-        """
-        if wrap:
-            shiftedy = datay.shift(lag)
-            shiftedy.iloc[:lag] = datay.iloc[-lag:].values
-            return datax.corr(shiftedy)
-        else: 
-            return datax.corr(datay.shift(lag))
-
-    seconds = 5
-    fps = 30
-    rs = [crosscorr(d1,d2, lag) for lag in range(-int(seconds*fps),int(seconds*fps+1))]
-    offset = np.floor(len(rs)/2)-np.argmax(np.abs(rs))
-    f,ax=plt.subplots(figsize=(14,3))
-    ax.plot(rs)
-    ax.axvline(np.ceil(len(rs)/2),color='k',linestyle='--',label='Center')
-    ax.axvline(np.argmax(np.abs(rs)),color='r',linestyle='--',label='Peak synchrony')
-    ax.set(title=f'Offset = {offset} frames\nS1 leads <> S2 leads', xlabel='Offset',ylabel='Pearson r')
-    ax.set_xticks([0, 50, 100, 151, 201, 251, 301])
-    ax.set_xticklabels([-150, -100, -50, 0, 50, 100, 150]);
-    plt.legend()
\ No newline at end of file
+    lags, rs = lagged_cross_corr(d1, d2, lags=max_lag, wrap=wrap)
+    peak = np.nanargmax(np.abs(rs))
+    offset = -lags[peak]
+    if ax is None:
+        _, ax = plt.subplots(figsize=(14, 3))
+    ax.plot(lags, rs)
+    ax.axvline(0, color='k', linestyle='--', label='Center')
+    ax.axvline(lags[peak], color='r', linestyle='--', label='Peak synchrony')
+    ax.set(title=f'Offset = {offset} frames\nS1 leads <> S2 leads', xlabel='Offset', ylabel='Pearson r')
+    ax.legend()
+    return offset
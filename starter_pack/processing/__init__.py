@@ -1,2 +1,9 @@
 from .base import ProcessorPipeline
-from .processors import *
\ No newline at end of file
+from starter_pack.core.lazy import lazy_attributes
+
+# The processors import scikit-learn, so they are imported on first access.
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    name: ".processors" for name in (
+        "DropColumns", "ReplaceNaN", "OneHotEncode", "SKLearnProcessor", "DatetimeEncoder", "Sentence2Vec", "Transform"
+    )
+})
@@ -1,9 +1,9 @@
 """A collection of implementations of ProcessorBase"""
 from typing import List, Callable
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler, OneHotEncoder as SKLearnOneHotEncoder
 from starter_pack.processing.base import ProcessBase
-from starter_pack.io import AsyncFetch
 
 class DropColumns(ProcessBase):
     """Drops columns from the dataset."""
@@ -1,7 +1,41 @@
+import re
 import urllib
 import json
-from typing import Dict, List, Any
-from datascience_starter.io import AsyncFetch
+import logging
+import unicodedata
+from typing import Dict, Iterable, List, Any, Optional
+from starter_pack.io import AsyncFetch, FetchError, ResponseCache
+
+log = logging.getLogger(__name__)
+
+#: Common street and unit designators mapped to their postal abbreviations.
+ADDRESS_ABBREVIATIONS = {
+    "street": "st", "road": "rd", "avenue": "ave", "boulevard": "blvd", "drive": "dr",
+    "lane": "ln", "court": "ct", "place": "pl", "terrace": "tce", "parade": "pde",
+    "highway": "hwy", "crescent": "cres", "square": "sq", "apartment": "apt",
+    "suite": "ste", "unit": "u", "level": "lvl", "north": "n", "south": "s",
+    "east": "e", "west": "w"
+}
+
+def normalize_address(address: str) -> str:
+    """Normalizes an address into a lookup key.
+
+    Unicode is folded (accents dropped), case and punctuation are removed, whitespace
+    is collapsed and common designators are abbreviated, so trivially different
+    spellings of one address share a key.
+
+    Args:
+        address: An address string.
+
+    Returns:
+        The normalized address.
+
+    """
+    text = unicodedata.normalize("NFKD", str(address))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    tokens = re.sub(r"[^\w\s/-]", " ", text).split()
+    return " ".join(ADDRESS_ABBREVIATIONS.get(token, token) for token in tokens)
+
 
 class Geocoder(AsyncFetch):
     """ A geocoder using Google Maps geocoding API.
@@ -12,14 +46,30 @@ class Geocoder(AsyncFetch):
 
     Args:
         api_key: A Google Public API key with geocoding enabled.
+        throttle_rate (optional): The maximum calls per second, or None to rely on
+            the concurrency limiter and Retry-After handling alone.
+        geocode_cache (optional): A cache of parsed results keyed by normalized address
+            (e.g. ``SQLiteCache(path, normalize=normalize_address)``), so repeated runs only
+            geocode new addresses. Failed lookups are not cached.
+        raw_path (optional): The file raw API responses are appended to when ``write_raw`` is set.
+        **kwargs: Key word arguements for AsyncFetch (e.g. a shared FetchClient or an AdaptiveLimiter).
 
     """
 
-    def __init__(self, api_key: str):
-        super().__init__()
+    def __init__(
+            self,
+            api_key: str,
+            throttle_rate: Optional[int] = 2,
+            geocode_cache: Optional[ResponseCache] = None,
+            raw_path: str = "./geocode_results.json",
+            **kwargs
+        ):
+        super().__init__(**kwargs)
         self.key = api_key  #: The Google Public API key with geocoding enabled.
         self.url_base = "https://maps.googleapis.com/maps/api/geocode/json?"    #: The base url of the API endpoint.
-        self.throttle_rate = 2  #: The throttling rate (class per second).
+        self.throttle_rate = throttle_rate  #: The throttling rate (class per second).
+        self.geocode_cache = geocode_cache  #: The cache of parsed results keyed by normalized address.
+        self.raw_path = raw_path    #: The file raw API responses are appended to.
 
     def encode(self, address: str, write_raw: bool = False):
         """Geoencode an address to lat, long and formatted addresses.
@@ -32,42 +82,68 @@ class Geocoder(AsyncFetch):
             The parsed json result object.
 
         """
-        self.encode_all([address], write_raw)
+        yield from self.encode_all([address], write_raw)
     
-    def encode_all(self, addresses: List[str], write_raw: bool = False):
-        """Geoencode an address to lat, long and formatted addresses.
+    def encode_all(self, addresses: Iterable[str], write_raw: bool = False):
+        """Geoencode addresses to lat, long and formatted addresses.
+
+        Addresses are deduplicated by their normalized form and looked up in the
+        geocode cache first, so only unique, uncached addresses are sent to the API.
 
         Args:
-            addresses: The address to geoencode.
+            addresses: The addresses to geoencode.
             write_raw: A boolean to indicate whether or not to write raw outputs to file.
 
         Yields:
-            The parsed json result object.
+            The parsed json result object for each address, in order.
 
         """
-        urls = list(map(self._build_url, addresses))
-        results = self.fetch_all(urls, rate=self.throttle_rate)
-        if write_raw:
-            self._write(results)
-        for address, result in zip(addresses, results):
-            result = self._parse(result, address)
-            yield result
+        addresses = list(addresses)
+        keys = [normalize_address(address) for address in addresses]
+        parsed: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, str] = {}
+        for key, address in zip(keys, addresses):
+            if key in parsed or key in pending:
+                continue
+            cached = self.geocode_cache.get(key) if self.geocode_cache is not None else None
+            if cached is not None:
+                parsed[key] = cached
+            else:
+                pending[key] = address
+        log.info(f"Geocoding {len(pending)} of {len(addresses)} addresses ({len(parsed)} cached)")
+        if pending:
+            results = self.fetch_all([self._build_url(address) for address in pending.values()], rate=self.throttle_rate)
+            if write_raw:
+                self._write(results)
+            for (key, address), result in zip(pending.items(), results):
+                parsed[key] = self._parse(result, address)
+                if self.geocode_cache is not None and parsed[key]["formatted_address"] != "ERROR":
+                    self.geocode_cache.set(key, parsed[key])
+            if self.geocode_cache is not None:
+                self.geocode_cache.flush()
+        for key, address in zip(keys, addresses):
+            yield {**parsed[key], "address": address}
 
     def _build_url(self, address: str):
         params = {"address": address, "key": self.key}
         return self.url_base + urllib.parse.urlencode(params)
 
-    def _write(self, results: str):
-        with open("./geocode_results.json", 'w') as f:
+    def _write(self, results: List[Any]):
+        with open(self.raw_path, 'a') as f:
             for result in results:
-                f.write(json.dumps(result) + "/n")
+                if isinstance(result, FetchError):
+                    continue
+                f.write(json.dumps(result) + "\n")
 
-    def _parse(self, result: Dict[str, Any], address: str):
-        self.log.info(f"Parsing: {address}")
+    def _parse(self, result: Any, address: str):
+        log.info(f"Parsing: {address}")
+        if isinstance(result, FetchError):
+            log.error(repr(result))
+            return { "formatted_address" : "ERROR", "lng": None, "lat": None, "address": address }
         try:
             result = result["results"][0]
             geometry = result["geometry"]["location"]
             return {"formatted_address": result["formatted_address"], "lng": geometry["lng"], "lat": geometry["lat"], "address": address}
-        except KeyError as e:
-            self.log.error(f"{e} : {result}")
+        except (KeyError, IndexError) as e:
+            log.error(f"{e} : {result}")
             return { "formatted_address" : "ERROR", "lng": None, "lat": None, "address": address }
\ No newline at end of file
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+def hash_file(path: Path, chunk_size: int = 2**20) -> str:
+    """Computes the MD5 digest of a file, reading it in chunks.
+
+    Args:
+        path: The path of the file.
+        chunk_size (optional): The number of bytes read at a time.
+
+    Returns:
+        The hex digest.
+
+    """
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DirectoryListing(NamedTuple):
+    """The matching files and the subdirectories of one directory."""
+    path: str
+    mtime: float
+    files: List[str]
+    subdirs: List[str]
+
+
+def walk_files(
+        root: str,
+        extensions: Optional[Iterable[str]] = None,
+        workers: int = 1,
+        checkpoint: Optional["Manifest"] = None
+    ) -> Iterator[DirectoryListing]:
+    """Lists the files under a directory in a single pass, one directory at a time.
+
+    Directories are read with ``os.scandir`` and listings are yielded as soon as they
+    are read, so consumers can start before the crawl finishes. Symbolic links to
+    directories are not followed and unreadable directories are logged and skipped.
+
+    When a checkpoint is given, directories it records as done (with an unchanged
+    mtime) are not read or yielded again, but their recorded subdirectories are still
+    visited. The consumer marks a listing done with ``checkpoint.mark_directory`` once
+    its files have been handled, so an interrupted crawl resumes where it stopped.
+
+    Args:
+        root: The directory to crawl.
+        extensions (optional): The file extensions to keep, e.g. ``[".pdf", ".docx"]``,
+            compared case insensitively. All files if None.
+        workers (optional): The number of threads reading directories concurrently.
+        checkpoint (optional): A manifest recording completed directories.
+
+    Yields:
+        A DirectoryListing per directory read.
+
+    """
+    extensions = {e.lower() if e.startswith(".") else f".{e.lower()}" for e in extensions} if extensions else None
+    if workers <= 1:
+        stack = [os.fspath(root)]
+        while stack:
+            listing, done = _list_directory(stack.pop(), extensions, checkpoint)
+            if listing is None:
+                continue
+            stack.extend(reversed(listing.subdirs))
+            if not done:
+                yield listing
+        return
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {pool.submit(_list_directory, os.fspath(root), extensions, checkpoint)}
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                listing, done = future.result()
+                if listing is None:
+                    continue
+                pending.update(pool.submit(_list_directory, d, extensions, checkpoint) for d in listing.subdirs)
+                if not done:
+                    yield listing
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def _list_directory(
+        path: str, extensions: Optional[Set[str]], checkpoint: Optional["Manifest"]
+    ) -> Tuple[Optional[DirectoryListing], bool]:
+    try:
+        mtime = os.stat(path).st_mtime
+        if checkpoint is not None:
+            subdirs = checkpoint.directory_done(path, mtime)
+            if subdirs is not None:
+                return DirectoryListing(path, mtime, [], subdirs), True
+        files, subdirs = [], []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file() and (extensions is None or os.path.splitext(entry.name)[1].lower() in extensions):
+                    files.append(entry.path)
+    except OSError as e:
+        log.warning(f"Skipping directory {path}: {e}")
+        return None, False
+    return DirectoryListing(path, mtime, sorted(files), sorted(subdirs)), False
+
+
+class Manifest:
+    """A persistent index of hashed files and extracted documents backed by SQLite.
+
+    Files are keyed by path, size and modification time, so an unchanged file maps
+    to its content hash without being read again. Documents are keyed by content
+    hash, so duplicates are found with an index lookup instead of a directory scan.
+    Crawled directories can be checkpointed so an interrupted ``walk_files`` resumes.
+    Writes are committed in batches of ``commit_every`` and on ``flush``, and the
+    connection is guarded by a lock so the manifest can be shared by worker threads.
+
+    Args:
+        path: The path of the SQLite database file.
+        commit_every: The number of writes between commits.
+
+    """
+    def __init__(self, path: str, commit_every: int = 1000):
+        super().__init__()
+        self.path = path    #: The path of the SQLite database file.
+        self.commit_every = commit_every    #: The number of writes between commits.
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, hash TEXT)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS documents (hash TEXT PRIMARY KEY, path TEXT, created REAL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS directories (path TEXT PRIMARY KEY, mtime REAL, subdirs TEXT)")
+        log.info(f"Manifest opened: {path}")
+
+    def lookup(self, path: Path, size: int, mtime: float) -> Optional[str]:
+        """Returns the recorded hash of a file, or None if it is new or has changed."""
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime, hash FROM files WHERE path = ?", (str(path),)).fetchone()
+        if row is None or row[0] != size or row[1] != mtime:
+            return None
+        return row[2]
+
+    def record_file(self, path: Path, size: int, mtime: float, hash: str):
+        """Records the hash of a file at its current size and modification time."""
+        self._write("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (str(path), size, mtime, hash))
+
+    def has_document(self, hash: str) -> bool:
+        """Checks whether a document with the given content hash has been extracted."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM documents WHERE hash = ?", (hash,)).fetchone() is not None
+
+    def add_document(self, hash: str, path: Optional[Path] = None):
+        """Records an extracted document by content hash."""
+        self._write("INSERT OR REPLACE INTO documents VALUES (?, ?, ?)", (hash, str(path) if path else None, time.time()))
+
+    def add_documents(self, hashes: Iterable[str]):
+        """Records many extracted documents, e.g. the existing files of an output directory."""
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO documents VALUES (?, NULL, ?)", ((h, time.time()) for h in hashes))
+            self._conn.commit()
+
+    def mark_directory(self, listing: DirectoryListing):
+        """Checkpoints a crawled directory whose files have all been handled."""
+        self._write("INSERT OR REPLACE INTO directories VALUES (?, ?, ?)", (listing.path, listing.mtime, json.dumps(listing.subdirs)))
+
+    def directory_done(self, path: str, mtime: float) -> Optional[List[str]]:
+        """Returns the subdirectories of a checkpointed directory, or None if it is new or has changed."""
+        with self._lock:
+            row = self._conn.execute("SELECT mtime, subdirs FROM directories WHERE path = ?", (path,)).fetchone()
+        if row is None or row[0] != mtime:
+            return None
+        return json.loads(row[1])
+
+    def clear_directories(self):
+        """Drops the crawl checkpoint so the next crawl reads every directory."""
+        with self._lock:
+            self._conn.execute("DELETE FROM directories")
+            self._conn.commit()
+
+    def flush(self):
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def _write(self, sql: str, params: tuple):
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
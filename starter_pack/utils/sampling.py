@@ -1,51 +1,473 @@
+import inspect
+import joblib
 import numpy as np
+import pandas as pd
 from enum import Enum
-from typing import Callable
+from scipy.stats import norm
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from tqdm import tqdm
 
+# numpy's multivariate hypergeometric sampler requires the urn to hold fewer items than this
+_MAX_URN = 10 ** 9 - 1
+
+ArrayLike = Union[np.ndarray, pd.DataFrame, pd.Series]
+Labels = Union[str, np.ndarray, pd.Series, None]
+Target = Union[int, Dict[Any, int], None]
+
 class BootstrapMethods(Enum):
     ORDINARY = 'ordinary'
     BALANCED = 'balanced'
+    MOVING = 'moving'
+    STATIONARY = 'stationary'
+
+class IntervalMethods(Enum):
+    PERCENTILE = 'percentile'
+    BCA = 'bca'
 
 class Sampler:
     """A class to provide sampling methods.
+
+    Resampling is driven by a seeded ``numpy.random.Generator`` and indices are drawn in
+    blocks of at most ``block_size`` elements, so memory is bounded regardless of the
+    number of resamples.
+
+    Args:
+        seed (optional): The seed for the random generator.
+        block_size (optional): The maximum number of indices held in memory per block.
+        n_jobs (optional): The number of joblib workers used by the batched methods.
+        backend (optional): The joblib backend (e.g. 'threading' for GIL-releasing statistics).
+
     """
-    
-    def bootstrap(self, X: np.ndarray, size: int, stat: Callable = np.mean, method: BootstrapMethods = 'balanced'):
+    def __init__(self, seed: Optional[int] = None, block_size: int = 2 ** 22, n_jobs: int = 1, backend: Optional[str] = None):
+        self._seed = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self._seed)  #: The random generator for sequential sampling.
+        self.block_size = block_size    #: The maximum number of indices held in memory per block.
+        self.n_jobs = n_jobs    #: The number of joblib workers.
+        self.backend = backend  #: The joblib backend.
+
+    def bootstrap(self,
+            X: ArrayLike,
+            size: int,
+            stat: Callable = np.mean,
+            method: BootstrapMethods = 'ordinary',
+            block_length: Optional[int] = None
+        ):
         """A method to implement a bootstrap.
 
-        Bootstrapping is a sampling technique to develop an estimate of 
+        Bootstrapping is a sampling technique to develop an estimate of
         the distribution of a sample statistic. A bootstrap samples with
         replacement from the original sample for N samples and calculates
         the statistic over the new sample. This process is repeated 'n' times.
 
-        Two sampling methods are implemented. An ordinary sample is a simple
-        sample with replacement and balanced utlises latin hypercube sampling
-        to sample from all n bins in the statespace.
+        Two sampling methods are implemented for independent rows. An ordinary
+        sample is a simple sample with replacement and balanced utlises latin
+        hypercube sampling to sample from all n bins in the statespace. Ordinary is the
+        default as it is several times faster on large samples; balanced gives lower
+        variance for a small number of resamples. For
+        timeseries, the moving block bootstrap resamples overlapping blocks of
+        block_length rows and the stationary bootstrap resamples blocks of
+        geometric length with mean block_length, preserving autocorrelation.
 
         Args:
-            X: A 1-D array of features to bootstrap.
+            X: An array or DataFrame whose rows are resampled.
             size: The number of bootstraps to sample.
             stat (optional): The statistic to compute on the bootstrap. Defaults to np.mean.
             method (optional): The sampling method of the bootstrap
+            block_length (optional): The (mean) block length of the block methods.
+                Defaults to the cube root of the number of rows.
 
         Yields:
             np.float: The statistic on the bootstrapped sample.
         """
+        method = BootstrapMethods(method)
+        blocks = _index_blocks(self.rng, len(X), size, method, block_length, self.block_size // _row_size(X))
+        with tqdm(total=size) as progress:
+            for idx in blocks:
+                for sel in idx:
+                    progress.update()
+                    yield stat(_take(X, sel))
+
+    def bootstrap_distribution(self,
+            X: ArrayLike,
+            size: int,
+            stat: Callable = np.mean,
+            method: BootstrapMethods = 'ordinary',
+            vectorized: Optional[bool] = None,
+            block_length: Optional[int] = None
+        ) -> np.ndarray:
+        """Evaluates a statistic over many bootstrap resamples at once.
+
+        Rows of X are resampled in blocks holding at most ``block_size`` elements. A
+        vectorized statistic is evaluated once per block on an array of shape
+        (resamples, rows, ...) along ``axis=1``; otherwise it is called per resample
+        with an array, or a DataFrame if X is one. Blocks are split into tasks and
+        run on ``n_jobs`` joblib workers, each with an independent child seed, so results
+        are reproducible for a given seed and ``n_jobs``.
+
+        Args:
+            X: An array or DataFrame whose rows are resampled.
+            size: The number of bootstraps to sample.
+            stat (optional): The statistic to compute on the bootstrap. Defaults to np.mean.
+            method (optional): The sampling method of the bootstrap.
+            vectorized (optional): Whether stat accepts an ``axis`` argument. Inferred from
+                the signature of stat if not provided.
+            block_length (optional): The (mean) block length of the block methods.
+
+        Returns:
+            An array of the statistic with the resamples along the first axis.
+
+        """
+        method = BootstrapMethods(method)
+        if vectorized is None:
+            vectorized = _accepts_axis(stat)
+        X = _prepare(X, vectorized)
+        tasks = self._split_tasks(size)
+        seeds = self._seed.spawn(len(tasks))
+        block_size = self.block_size // _row_size(X)
+        results = joblib.Parallel(n_jobs=self.n_jobs, backend=self.backend)(
+            joblib.delayed(_bootstrap_task)(X, m, stat, method, block_length, seed, block_size, vectorized)
+            for m, seed in zip(tasks, seeds)
+        )
+        return np.concatenate(results)
+
+    def confidence_interval(self,
+            X: ArrayLike,
+            size: int,
+            stat: Callable = np.mean,
+            alpha: float = 0.05,
+            interval: IntervalMethods = 'percentile',
+            method: BootstrapMethods = 'ordinary',
+            vectorized: Optional[bool] = None,
+            block_length: Optional[int] = None,
+            jackknife_groups: int = 1000,
+            jackknife: Optional[Callable[[ArrayLike, np.ndarray, int], np.ndarray]] = None
+        ) -> Tuple[np.ndarray, np.ndarray]:
+        """Computes a two-sided bootstrap confidence interval for a statistic.
+
+        The BCa interval corrects the percentile interval for bias and skew. Its
+        acceleration is estimated with a jackknife, which is grouped into at most
+        ``jackknife_groups`` delete-d groups. For the block methods the groups are
+        contiguous runs of rows. Each group evaluates ``stat`` on all the other rows, so
+        BCa costs about ``jackknife_groups`` extra passes over X; for large samples pass
+        a ``jackknife`` computing the left-out statistics from per-group sums instead.
+
+        Args:
+            X: An array or DataFrame whose rows are resampled.
+            size: The number of bootstraps to sample.
+            stat (optional): The statistic to compute on the bootstrap. Defaults to np.mean.
+            alpha (optional): The significance level (e.g. 0.05 for a 95% interval).
+            interval (optional): The interval method, 'percentile' or 'bca'.
+            method (optional): The sampling method of the bootstrap.
+            vectorized (optional): Whether stat accepts an ``axis`` argument.
+            block_length (optional): The (mean) block length of the block methods.
+            jackknife_groups (optional): The maximum number of jackknife groups for BCa.
+            jackknife (optional): A function of (X, group labels, number of groups) returning
+                the statistic with each group left out, stacked along the first axis.
+
+        Returns:
+            The lower and upper bounds of the interval.
+
+        """
+        method = BootstrapMethods(method)
+        interval = IntervalMethods(interval)
+        if vectorized is None:
+            vectorized = _accepts_axis(stat)
+        X = _prepare(X, vectorized)
+        dist = self.bootstrap_distribution(X, size, stat, method, vectorized, block_length)
+        q = np.array([alpha / 2, 1 - alpha / 2]).reshape((2,) + (1,) * (dist.ndim - 1))
+        if interval is IntervalMethods.PERCENTILE:
+            q = np.broadcast_to(q, (2,) + dist.shape[1:])
+        else:
+            theta = _apply_stat(stat, X, np.arange(len(X))[None], vectorized)[0]
+            jack = self._jackknife(X, stat, vectorized, jackknife_groups, method, jackknife)
+            z0 = norm.ppf(np.mean(dist < theta, axis=0))
+            d = jack.mean(axis=0) - jack
+            with np.errstate(divide='ignore', invalid='ignore'):
+                a = np.sum(d ** 3, axis=0) / (6 * np.sum(d ** 2, axis=0) ** 1.5)
+            z = norm.ppf(q)
+            q = norm.cdf(z0 + (z0 + z) / (1 - a * (z0 + z)))
+        low, high = _quantiles(dist, q)
+        return low, high
+
+    def undersample(self,
+            X: ArrayLike,
+            n: Target = None,
+            labels: Labels = None,
+            shuffle: bool = False,
+            return_indices: bool = False
+        ) -> ArrayLike:
+        """Randomly undersamples each stratum to at most n rows without replacement.
+
+        Sampling works on row indices only, so the frame is never copied in full and
+        ``return_indices`` avoids copying rows at all.
+
+        Args:
+            X: An array or DataFrame to sample rows from.
+            n (optional): The rows to keep per stratum, or a dictionary of rows per label.
+                Defaults to the size of the smallest stratum.
+            labels (optional): The stratum labels, or a column name of X. Rows with a missing
+                label are dropped. If not provided all rows form a single stratum.
+            shuffle (optional): Whether to shuffle the output rather than keep the input order.
+            return_indices (optional): Whether to return the selected row positions instead of rows.
+
+        Returns:
+            The sampled rows (or their positions).
+
+        """
+        uniques, strata = self._strata(X, labels)
+        targets = self._targets(n, uniques, strata, min)
+        idx = [
+            s if t >= len(s) else s[self.rng.choice(len(s), t, replace=False)]
+            for s, t in zip(strata, targets)
+        ]
+        return self._select(X, idx, shuffle, return_indices)
+
+    def oversample(self,
+            X: ArrayLike,
+            n: Target = None,
+            labels: Labels = None,
+            shuffle: bool = False,
+            return_indices: bool = False
+        ) -> ArrayLike:
+        """Randomly oversamples each stratum to at least n rows.
+
+        Every row is kept and each stratum smaller than n is topped up by sampling its
+        rows with replacement.
+
+        Args:
+            X: An array or DataFrame to sample rows from.
+            n (optional): The rows per stratum, or a dictionary of rows per label.
+                Defaults to the size of the largest stratum.
+            labels (optional): The stratum labels, or a column name of X. Rows with a missing
+                label are dropped. If not provided all rows form a single stratum.
+            shuffle (optional): Whether to shuffle the output rather than keep the input order.
+            return_indices (optional): Whether to return the selected row positions instead of rows.
+
+        Returns:
+            The sampled rows (or their positions).
+
+        """
+        uniques, strata = self._strata(X, labels)
+        targets = self._targets(n, uniques, strata, max)
+        idx = [
+            s if t <= len(s) else np.concatenate((s, s[self.rng.integers(0, len(s), t - len(s))]))
+            for s, t in zip(strata, targets)
+        ]
+        return self._select(X, idx, shuffle, return_indices)
+
+    def reservoir_sample(self,
+            chunks: Iterable[ArrayLike],
+            n: int,
+            labels: Union[str, Callable, None] = None,
+            oversample: bool = False
+        ) -> ArrayLike:
+        """Samples n rows per stratum from a stream of chunks in a single pass.
+
+        Each row is given a uniform random key and every stratum keeps the rows with the
+        n smallest keys seen so far, which is a uniform sample without replacement. Only
+        the reservoirs and one chunk are held in memory, so the stream can be larger than
+        memory, and the result is reproducible for a given seed and chunking.
+
+        Args:
+            chunks: An iterable of arrays or DataFrames (e.g. ``pd.read_csv(..., chunksize=...)``).
+            n: The number of rows to keep per stratum.
+            labels (optional): A column name or a function mapping a chunk to its labels.
+                If not provided all rows form a single stratum.
+            oversample (optional): Whether to top up strata with fewer than n rows by sampling
+                with replacement.
+
+        Returns:
+            The sampled rows, grouped by stratum. Empty (with the columns of the first
+            chunk, if any) when the stream has no rows.
+
+        """
+        reservoirs = {}
+        empty = np.empty(0)
+        for i, chunk in enumerate(chunks):
+            if i == 0:
+                empty = _take(chunk, np.arange(0))
+            keys = self.rng.random(len(chunk))
+            chunk_labels = labels(chunk) if callable(labels) else labels
+            for label, rows in zip(*self._strata(chunk, chunk_labels)):
+                res_keys, res_rows = reservoirs.get(label, (np.empty(0), None))
+                if len(res_keys) == n:
+                    # only rows with a smaller key than the reservoir's largest can enter
+                    rows = rows[keys[rows] < res_keys.max()]
+                    if not len(rows):
+                        continue
+                res_keys = np.concatenate((res_keys, keys[rows]))
+                res_rows = _concat([res_rows, _take(chunk, rows)])
+                if len(res_keys) > n:
+                    keep = np.argpartition(res_keys, n - 1)[:n]
+                    res_keys, res_rows = res_keys[keep], _take(res_rows, keep)
+                reservoirs[label] = (res_keys, res_rows)
+        samples = []
+        for _, rows in reservoirs.values():
+            if oversample and len(rows) < n:
+                rows = _concat([rows, _take(rows, self.rng.integers(0, len(rows), n - len(rows)))])
+            samples.append(rows)
+        return _concat(samples) if samples else empty
+
+    def _strata(self, X: ArrayLike, labels: Labels) -> Tuple[List[Any], List[np.ndarray]]:
+        """Groups row positions by label with a linear-time factorize and a radix sort."""
+        if labels is None:
+            return [None], [np.arange(len(X))]
+        if isinstance(labels, str):
+            labels = X[labels]
+        codes, uniques = pd.factorize(np.asarray(labels), sort=True)
+        valid = np.flatnonzero(codes >= 0) if np.any(codes < 0) else None
+        if valid is not None:
+            codes = codes[valid]
+        # a stable sort on a small unsigned dtype is a radix sort in numpy
+        codes = codes.astype(np.min_scalar_type(max(len(uniques) - 1, 0)))
+        order = np.argsort(codes, kind='stable')
+        if valid is not None:
+            order = valid[order]
+        bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+        return list(uniques), np.split(order, bounds)
+
+    def _targets(self, n: Target, uniques: List[Any], strata: List[np.ndarray], default: Callable) -> List[int]:
+        if n is None:
+            return [default(len(s) for s in strata)] * len(strata)
+        if isinstance(n, dict):
+            return [n.get(u, len(s)) for u, s in zip(uniques, strata)]
+        return [n] * len(strata)
+
+    def _select(self, X: ArrayLike, idx: List[np.ndarray], shuffle: bool, return_indices: bool) -> ArrayLike:
+        idx = np.concatenate(idx)
+        idx = self.rng.permutation(idx) if shuffle else np.sort(idx)
+        return idx if return_indices else _take(X, idx)
+
+    def _split_tasks(self, size: int) -> List[int]:
+        """Splits the resamples evenly over the workers."""
+        per_task = -(-size // joblib.effective_n_jobs(self.n_jobs))
+        return [min(per_task, size - i) for i in range(0, size, per_task)]
+
+    def _jackknife(
+            self,
+            X: ArrayLike,
+            stat: Callable,
+            vectorized: bool,
+            groups: int,
+            method: BootstrapMethods,
+            jackknife: Optional[Callable] = None
+        ) -> np.ndarray:
+        """Evaluates delete-d jackknife statistics over at most ``groups`` groups of rows."""
         n = len(X)
-        idx = np.random.permutation(n * size)
-        for i in tqdm(range(size)):
-            if method == 'balanced':
-                sel = idx[i * n : (i + 1) * n] % n
-                yield stat(X[sel])
+        groups = min(n, groups)
+        if method in (BootstrapMethods.MOVING, BootstrapMethods.STATIONARY):
+            labels = np.arange(n) * groups // n
+        else:
+            labels = self.rng.permutation(n) % groups
+        if jackknife is not None:
+            return np.asarray(jackknife(X, labels, groups))
+        return np.stack([
+            _apply_stat(stat, X, np.flatnonzero(labels != g)[None], vectorized)[0] for g in range(groups)
+        ])
+
+
+def _bootstrap_task(
+        X: ArrayLike,
+        size: int,
+        stat: Callable,
+        method: BootstrapMethods,
+        block_length: Optional[int],
+        seed: np.random.SeedSequence,
+        block_size: int,
+        vectorized: bool
+    ) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    blocks = _index_blocks(rng, len(X), size, method, block_length, block_size)
+    return np.concatenate([_apply_stat(stat, X, idx, vectorized) for idx in blocks])
+
+def _index_blocks(
+        rng: np.random.Generator,
+        n: int,
+        size: int,
+        method: BootstrapMethods,
+        block_length: Optional[int],
+        block_size: int
+    ) -> Iterator[np.ndarray]:
+    """Yields (m, n) blocks of resample indices with m * n bounded by ``block_size``.
+
+    The balanced bootstrap draws each block's multiset of indices from an urn holding
+    one copy of every index per resample, then shuffles it into resamples. This is
+    equivalent to permuting all n * size indices without materialising them.
+    """
+    per_block = max(1, min(size, block_size // max(n, 1)))
+    if block_length is None:
+        block_length = max(1, int(round(n ** (1 / 3))))
+    if method is not BootstrapMethods.BALANCED:
+        for start in range(0, size, per_block):
+            m = min(per_block, size - start)
+            if method is BootstrapMethods.ORDINARY:
+                yield rng.integers(0, n, size=(m, n))
+            elif method is BootstrapMethods.MOVING:
+                yield _moving_blocks(rng, n, m, min(block_length, n))
             else:
-                resample = np.random.choice(X, n, replace=True)
-                yield stat(resample)
+                yield _stationary_blocks(rng, n, m, block_length)
+        return
+    arange = np.arange(n)
+    per_urn = max(1, _MAX_URN // max(n, 1))
+    for start in range(0, size, per_urn):
+        remaining = min(per_urn, size - start)
+        urn = np.full(n, remaining, dtype=np.int64)
+        while remaining:
+            m = min(per_block, remaining)
+            counts = rng.multivariate_hypergeometric(urn, m * n)
+            urn -= counts
+            remaining -= m
+            idx = np.repeat(arange, counts)
+            rng.shuffle(idx)
+            yield idx.reshape(m, n)
+
+def _moving_blocks(rng: np.random.Generator, n: int, m: int, length: int) -> np.ndarray:
+    """Concatenates randomly placed runs of ``length`` rows, truncated to n rows."""
+    starts = rng.integers(0, n - length + 1, size=(m, -(-n // length)))
+    return (starts[:, :, None] + np.arange(length)).reshape(m, -1)[:, :n]
+
+def _stationary_blocks(rng: np.random.Generator, n: int, m: int, mean_length: float) -> np.ndarray:
+    """Politis and Romano's stationary bootstrap: circular runs with geometric lengths."""
+    new = rng.random((m, n)) < 1 / mean_length
+    new[:, 0] = True
+    positions = np.arange(n)
+    run_start = np.maximum.accumulate(np.where(new, positions, 0), axis=1)
+    starts = rng.integers(0, n, size=(m, n))
+    return (np.take_along_axis(starts, run_start, axis=1) + positions - run_start) % n
+
+def _take(X: ArrayLike, idx: np.ndarray) -> ArrayLike:
+    return X.iloc[idx] if isinstance(X, (pd.DataFrame, pd.Series)) else np.asarray(X)[idx]
+
+def _concat(parts: List[Optional[ArrayLike]]) -> ArrayLike:
+    parts = [p for p in parts if p is not None]
+    return pd.concat(parts) if isinstance(parts[0], (pd.DataFrame, pd.Series)) else np.concatenate(parts)
+
+def _prepare(X: ArrayLike, vectorized: bool) -> ArrayLike:
+    """Vectorized statistics see a (resamples, rows, ...) array, so pandas objects are unwrapped."""
+    if vectorized or not isinstance(X, (pd.DataFrame, pd.Series)):
+        return np.asarray(X)
+    return X
+
+def _row_size(X: ArrayLike) -> int:
+    return max(1, int(np.prod(np.shape(X)[1:])))
 
-    def undersample(self, X, n):
-        raise NotImplementedError
+def _apply_stat(stat: Callable, X: ArrayLike, idx: np.ndarray, vectorized: bool) -> np.ndarray:
+    if vectorized:
+        return np.asarray(stat(np.take(X, idx, axis=0), axis=1))
+    return np.stack([np.asarray(stat(_take(X, sel))) for sel in idx])
 
-    def oversample(self, X, n):
-        raise NotImplementedError
+def _accepts_axis(stat: Callable) -> bool:
+    try:
+        return 'axis' in inspect.signature(stat).parameters
+    except (TypeError, ValueError):
+        return False
 
-    
\ No newline at end of file
+def _quantiles(dist: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Linearly interpolated quantiles of dist along axis 0, with a separate q per element."""
+    dist = np.sort(dist, axis=0)
+    pos = np.nan_to_num(q) * (len(dist) - 1)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, len(dist) - 1)
+    frac = pos - lo
+    values = np.take_along_axis(dist, lo, axis=0) * (1 - frac) + np.take_along_axis(dist, hi, axis=0) * frac
+    return np.where(np.isnan(q), np.nan, values)
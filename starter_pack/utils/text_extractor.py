@@ -1,11 +1,12 @@
 import string
 import argparse
-import hashlib
 import datetime as dt
 import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from tika import parser
-from typing import Optional, List, Generator
+from starter_pack.utils.manifest import DirectoryListing, Manifest, hash_file, walk_files
+from typing import Any, Dict, Optional, List, Generator, Set, Tuple
 
 log = logging.getLogger(__name__)
 
@@ -18,11 +19,14 @@ class TextExtactor:
     Args:
         tika_server (str): The hostname and port of the tika server.
         output_dir (str): The directory to save extracted text files.
+        workers (int): The number of documents sent to the Tika server concurrently.
+        manifest (str): The path of the SQLite manifest. Defaults to ``.manifest.sqlite`` in
+            the output directory, seeded from any text files already there.
 
     Attributes:
         ouput_dir (Path): The directory to write output files.
     """
-    def __init__(self, tika_server: str, output_dir: str):
+    def __init__(self, tika_server: str, output_dir: str, workers: int = 1, manifest: Optional[str] = None):
         super().__init__()
         self._server = tika_server
         self._headers = { 
@@ -31,73 +35,149 @@ class TextExtactor:
                 "X-Tika-OCRTimeout": "300"
             }
         self._tika_timeout = 300
+        self._lock = threading.Lock()
+        self._in_flight: Set[str] = set()
         self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers  #: The number of documents sent to the Tika server concurrently.
+        self.manifest = Manifest(manifest or str(self.output_dir / ".manifest.sqlite"))  #: The index of hashed files and extracted documents.
+        if not len(self.manifest):
+            self.manifest.add_documents(f.stem for f in self.output_dir.glob("*.txt"))
 
     def extract(self,
             input_dir: Path, 
             file_types: Optional[List[str]] = None, 
-            limit: Optional[int] = None
+            limit: Optional[int] = None,
+            workers: Optional[int] = None,
+            crawl_workers: int = 1,
+            resume: bool = False
         ) -> Generator:
         """ Extracts the text from each file and writes to the output directory.
+
+        Directories are crawled lazily and each file is hashed, checked against the
+        corpus and sent to the Tika server on a pool of ``workers`` threads, with at
+        most twice that many files in progress. Results are yielded as they complete,
+        so their order may differ from the crawl. A file that fails to extract is
+        logged and skipped. Directories are checkpointed in the manifest once all
+        their files are extracted (or found to be duplicates), so an interrupted run can
+        continue with ``resume`` and files that failed are retried.
+
         Args:
             input_dir: The directory to crawl and extract text.
+            file_types: The file extensions to extract. All files if None.
             limit: The limit on the number of files extracted.
+            workers: The number of concurrent extractions. Defaults to ``self.workers``.
+            crawl_workers: The number of threads reading directories concurrently.
+            resume: Whether to skip directories completed by a previous, interrupted run.
 
         Yields:
             The metadata and extracted text.
         """
-        files = self._find_files(input_dir, file_types)
-        for i, path in enumerate(files):
-            _id = self.hash_file(path)
-            if self.check_duplicate(_id):
-                log.debug("Duplicate: File found in corpus.") # what if path changed
-                continue
-            else:
-                log.info('Extracting: {}'.format(path))
-                doc = parser.from_file(
-                        str(path), 
-                        serverEndpoint=f'{self._server}/rmeta/text', 
-                        requestOptions={
-                            "headers": self._headers,
-                            "timeout": self._tika_timeout
-                        }
-                    )
-                if doc['status'] == 200:
-                    metadata = doc['metadata']
-                    self._clean_metadata(metadata)  # add more metadata to extract
-                    text = str(doc['content']).strip()
-                    btext = text.encode('windows-1252', errors='ignore')  # clean up utf-8 errors
-                    self.output_dir.joinpath(f"{_id}.txt").write_bytes(btext)
-                    meta = {
-                        "corpus_id": _id,
-                        "path": str(path.absolute()),
-                        "extension": path.suffix,
-                        "extract_time": dt.datetime.now()
-                    }
-                    yield meta, text
-                else:
-                    log.error('Unsucessfull request {}.'.format(doc['status']))
-            
-            if limit is not None and i >= limit:
-                break
+        workers = workers or self.workers
+        if not resume:
+            self.manifest.clear_directories()
+        listings = walk_files(input_dir, file_types, workers=crawl_workers, checkpoint=self.manifest)
+        pool = ThreadPoolExecutor(max_workers=workers)
+        pending: Dict[Future, DirectoryListing] = {}
+        remaining: Dict[str, int] = {}
+        failed: Set[str] = set()
+        submitted = 0
+        try:
+            for listing in listings:
+                if not listing.files:
+                    self.manifest.mark_directory(listing)
+                    continue
+                files = listing.files if limit is None else listing.files[:limit - submitted]
+                # a directory truncated by the limit keeps one count outstanding and is never checkpointed
+                remaining[listing.path] = len(files) + (len(files) < len(listing.files))
+                for path in files:
+                    pending[pool.submit(self._extract_file, Path(path))] = listing
+                    submitted += 1
+                    if len(pending) >= 2 * workers:
+                        yield from self._completed(pending, remaining, failed)
+                if limit is not None and submitted >= limit:
+                    break
+            while pending:
+                yield from self._completed(pending, remaining, failed)
+        finally:
+            pool.shutdown(cancel_futures=True)
+            self.manifest.flush()
+
+    def _completed(self, pending: Dict[Future, DirectoryListing], remaining: Dict[str, int], failed: Set[str]) -> Generator:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            listing = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                log.error(f"Extraction failed: {e!r}")
+                failed.add(listing.path)
+                result = None
+            remaining[listing.path] -= 1
+            if remaining[listing.path] == 0:
+                del remaining[listing.path]
+                # a directory with a failed file is crawled again on resume
+                if listing.path not in failed:
+                    self.manifest.mark_directory(listing)
+                failed.discard(listing.path)
+            if result is not None:
+                yield result
+
+    def _extract_file(self, path: Path) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Extracts a file, returning None for a duplicate and raising if extraction fails."""
+        try:
+            stat = path.stat()
+            _id = self.manifest.lookup(path.absolute(), stat.st_size, stat.st_mtime)
+            if _id is None:
+                _id = self.hash_file(path)
+                self.manifest.record_file(path.absolute(), stat.st_size, stat.st_mtime, _id)
+            with self._lock:
+                if _id in self._in_flight or self.check_duplicate(_id):
+                    log.debug(f"Duplicate: {path} found in corpus.")
+                    return None
+                self._in_flight.add(_id)
+            try:
+                return self._parse_file(path, _id)
+            finally:
+                with self._lock:
+                    self._in_flight.discard(_id)
+        except Exception as e:
+            raise RuntimeError(f"Extraction failed for {path}: {e!r}") from e
+
+    def _parse_file(self, path: Path, _id: str) -> Tuple[Dict[str, Any], str]:
+        from tika import parser
+        log.info('Extracting: {}'.format(path))
+        doc = parser.from_file(
+                str(path), 
+                serverEndpoint=self._server, 
+                headers=dict(self._headers),
+                requestOptions={"timeout": self._tika_timeout}
+            )
+        if doc['status'] != 200:
+            raise RuntimeError('Unsucessfull request {} for {}.'.format(doc['status'], path))
+        metadata = doc['metadata']
+        self._clean_metadata(metadata)  # add more metadata to extract
+        text = str(doc['content']).strip()
+        btext = text.encode('windows-1252', errors='ignore')  # clean up utf-8 errors
+        self.output_dir.joinpath(f"{_id}.txt").write_bytes(btext)
+        self.manifest.add_document(_id, path.absolute())
+        meta = {
+            "corpus_id": _id,
+            "path": str(path.absolute()),
+            "extension": path.suffix,
+            "extract_time": dt.datetime.now()
+        }
+        return meta, text
 
     def hash_file(self, path: Path) -> str:
-        return hashlib.md5(path.read_bytes()).hexdigest()
+        return hash_file(path)
 
     def check_duplicate(self, hash: str) -> bool:
-        for fname in self.output_dir.iterdir():
-            if hash == fname.stem:
-                return True
-        return False
-
-    def _find_files(self, input_dir: Path, ftype_rstrict: Optional[List[str]] = None) -> List[Path]:
-        if ftype_rstrict:
-            files = []
-            for ftype in ftype_rstrict:
-                files.extend([f for f in Path(input_dir).glob("**/*" + ftype) if f.is_file()])
-            return files
-        else:
-            return [f for f in Path(input_dir).glob("**/*") if f.is_file()]
+        return self.manifest.has_document(hash)
+
+    def _find_files(self, input_dir: Path, ftype_rstrict: Optional[List[str]] = None) -> Generator:
+        for listing in walk_files(input_dir, ftype_rstrict):
+            yield from map(Path, listing.files)
 
     def _clean_metadata(self, metadata):
         return metadata
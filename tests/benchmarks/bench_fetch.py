@@ -0,0 +1,54 @@
+"""Benchmarks AsyncFetch against a local stand-in server.
+
+Run from the repository root with ``python -m tests.benchmarks.bench_fetch``.
+"""
+import time
+import logging
+from starter_pack.io import AsyncFetch
+from starter_pack.io.control import AdaptiveLimiter
+from tests.stand_in import StandInServer
+
+
+def bench_rate_limited(server: StandInServer, n: int = 2000, window: int = 100):
+    """Fixed versus adaptive concurrency against an API that throttles beyond its capacity."""
+    urls = [f"{server.url}/limited/{i}" for i in range(n)]
+    for name, limiter in (("fixed", None), ("adaptive", AdaptiveLimiter())):
+        server.hits.clear()
+        fetcher = AsyncFetch(limiter=limiter, backoff=0.05)
+        responses = fetcher.fetch_all(urls, window=window)
+        stats = fetcher.stats.summary()
+        failed = sum(not isinstance(r, dict) for r in responses)
+        print(
+            f"{name:>8}: {stats['throughput']:7.0f} urls/s  429s={stats['throttled']:5d}  "
+            f"retries={stats['retries']:5d}  failed={failed:3d}  "
+            f"p50={stats['p50'] * 1000:5.0f}ms  p99={stats['p99'] * 1000:5.0f}ms"
+        )
+
+
+def bench_small_batches(server: StandInServer, batches: int = 200, size: int = 5):
+    """Per-call overhead of many small batches with and without a persistent FetchClient."""
+    batch_urls = [[f"{server.url}/json/{b * size + i}" for i in range(size)] for b in range(batches)]
+    server.peers.clear()
+    start = time.perf_counter()
+    fetcher = AsyncFetch()
+    for urls in batch_urls:
+        fetcher.fetch_all(urls)
+    per_call = (time.perf_counter() - start) / batches
+    print(f"  per-call session: {per_call * 1000:6.2f} ms/call  connections={len(server.peers)}")
+    server.peers.clear()
+    start = time.perf_counter()
+    with AsyncFetch() as fetcher:
+        for urls in batch_urls:
+            fetcher.fetch_all(urls)
+    per_call = (time.perf_counter() - start) / batches
+    print(f"persistent client: {per_call * 1000:6.2f} ms/call  connections={len(server.peers)}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    server = StandInServer()
+    try:
+        bench_rate_limited(server)
+        bench_small_batches(server)
+    finally:
+        server.close()
@@ -0,0 +1,25 @@
+"""Benchmarks the import time of starter_pack modules in fresh interpreters.
+
+Run from the repository root with ``python -m tests.benchmarks.bench_imports``.
+"""
+import sys
+import time
+import subprocess
+from tests.unit_tests.test_lazy import HEAVY, MODULES
+
+
+def bench_import(module: str, repeat: int = 3):
+    """The best wall time to import a module and the heavy dependencies it loads."""
+    code = f"import sys\nimport {module}\nprint(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    best, loaded = float("inf"), ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip()
+        best = min(best, time.perf_counter() - start)
+    print(f"{module:>40}: {best * 1000:7.0f} ms  heavy=[{loaded}]")
+
+
+if __name__ == "__main__":
+    bench_import("sys")
+    for module in MODULES + ("starter_pack.utils.geocoding", "starter_pack.dataset.base"):
+        bench_import(module)
@@ -0,0 +1,47 @@
+"""Benchmarks Base.save and Base.from_pickle across compression and memory-mapping options.
+
+Run from the repository root with ``python -m tests.benchmarks.bench_persistence``.
+"""
+import os
+import time
+import logging
+import tempfile
+import numpy as np
+from starter_pack.core.base import Base
+
+
+class Arrays(Base):
+    def __init__(self, rows: int, cols: int):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(rows, cols))
+        self.y = rng.integers(0, 10, size=rows).astype(np.float64)
+
+
+def bench_save_load(rows: int = 500_000, cols: int = 16):
+    """Save time, load time and size per compression codec, and memory-mapped loads."""
+    obj = Arrays(rows, cols)
+    options = [(None, 0, None), (None, 0, "r"), ("zlib", 1, None), ("zlib", 3, None), ("lz4", 3, None), ("lzma", 1, None)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for compression, level, mmap_mode in options:
+            path = os.path.join(tmp, f"{compression}-{level}.joblib")
+            try:
+                start = time.perf_counter()
+                obj.save(path, compression=compression, level=level)
+                saved = time.perf_counter() - start
+            except ValueError as e:
+                print(f"{compression:>6} skipped: {e}")
+                continue
+            start = time.perf_counter()
+            loaded = Arrays.from_pickle(path, mmap_mode=mmap_mode)
+            loaded_in = time.perf_counter() - start
+            assert loaded.X.shape == obj.X.shape
+            name = f"{compression or 'none'}:{level}" + (f" mmap={mmap_mode}" if mmap_mode else "")
+            print(
+                f"{name:>14}: save={saved:6.2f}s  load={loaded_in:6.3f}s  "
+                f"size={os.path.getsize(path) / 2**20:7.1f}MB  memmap={isinstance(loaded.X, np.memmap)}"
+            )
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    bench_save_load()
@@ -0,0 +1,34 @@
+"""Benchmarks predict_posterior against scoring the posterior draws one at a time.
+
+Run from the repository root with ``python -m tests.benchmarks.bench_posterior``.
+"""
+import time
+import numpy as np
+from scipy.special import expit
+from starter_pack.models.glm.posterior import predict_posterior
+
+
+def bench_posterior(rows: int = 1_000_000, features: int = 10, draws: int = 1_000):
+    """Time to score every row against every draw, with and without quantiles."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, features))
+    alpha, beta = rng.normal(size=draws), rng.normal(size=(draws, features))
+
+    start = time.perf_counter()
+    total = np.zeros(rows)
+    for a, b in zip(alpha, beta):
+        total += expit(a + X @ b)
+    print(f"  draw by draw (mean): {time.perf_counter() - start:6.2f}s")
+
+    start = time.perf_counter()
+    summary = predict_posterior(X, alpha, beta, "sigmoid")
+    print(f"       blocked (mean): {time.perf_counter() - start:6.2f}s")
+    assert np.allclose(summary.mean, total / draws)
+
+    start = time.perf_counter()
+    predict_posterior(X, alpha, beta, "sigmoid", quantiles=[0.05, 0.95])
+    print(f"  blocked (quantiles): {time.perf_counter() - start:6.2f}s")
+
+
+if __name__ == "__main__":
+    bench_posterior()
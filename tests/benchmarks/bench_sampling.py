@@ -0,0 +1,27 @@
+"""Benchmarks the bootstrap methods of Sampler, including the default path.
+
+Run from the repository root with ``python -m tests.benchmarks.bench_sampling``.
+"""
+import time
+import numpy as np
+from starter_pack.utils.sampling import Sampler
+
+
+def bench_bootstrap(rows: int = 1_000_000, size: int = 100):
+    """Seconds per ``size`` resamples of the mean for each method and the default."""
+    X = np.random.default_rng(0).exponential(size=rows)
+    start = time.perf_counter()
+    Sampler(seed=0).bootstrap_distribution(X, size)
+    print(f"{'default':>10}: {time.perf_counter() - start:6.2f}s")
+    for method in ("ordinary", "balanced", "moving", "stationary"):
+        start = time.perf_counter()
+        Sampler(seed=0).bootstrap_distribution(X, size, method=method)
+        print(f"{method:>10}: {time.perf_counter() - start:6.2f}s")
+    for interval in ("percentile", "bca"):
+        start = time.perf_counter()
+        Sampler(seed=0).confidence_interval(X, size, interval=interval)
+        print(f"{'ci ' + interval:>10}: {time.perf_counter() - start:6.2f}s")
+
+
+if __name__ == "__main__":
+    bench_bootstrap()
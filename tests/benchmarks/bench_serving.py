@@ -0,0 +1,56 @@
+"""Load tests the micro-batching model server locally.
+
+Run from the repository root with ``python -m tests.benchmarks.bench_serving``.
+"""
+import time
+import asyncio
+import logging
+import aiohttp
+import numpy as np
+from aiohttp import web
+from sklearn.ensemble import GradientBoostingRegressor
+from starter_pack.models.base import SKLearnModel
+from starter_pack.models.serving import MicroBatcher, create_app
+
+
+async def load_test(model, requests: int = 2000, concurrency: int = 64, **kwargs):
+    """Fires single-row requests at a local server and reports client and server side stats."""
+    batcher = MicroBatcher(model, **kwargs)
+    runner = web.AppRunner(create_app(batcher))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    rows = np.random.default_rng(0).normal(size=(requests, 20)).tolist()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def call(session, row):
+        async with semaphore:
+            start = time.perf_counter()
+            async with session.post(f"{url}/predict", json=row) as response:
+                await response.json()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+        await asyncio.gather(*(call(session, row) for row in rows))
+        stats = await (await session.get(f"{url}/stats")).json()
+    elapsed = time.perf_counter() - start
+    await runner.cleanup()
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(
+        f"batch<={kwargs.get('max_batch_size', 64):3d}: {requests / elapsed:7.0f} req/s  "
+        f"p50={p50:6.1f}ms  p99={p99:6.1f}ms  mean batch={stats['mean_batch_size']:5.1f}  "
+        f"max queue={stats['max_queue_depth']}"
+    )
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(5000, 20))
+    model = SKLearnModel(GradientBoostingRegressor, "mse", n_estimators=200)
+    model.fit(X, X[:, 0] + rng.normal(size=5000))
+    for max_batch_size in (1, 16, 64):
+        asyncio.run(load_test(model, max_batch_size=max_batch_size, max_wait=0.002))
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from collections import Counter
+from aiohttp import web
+
+
+class StandInServer:
+    """A local aiohttp server run on a background event loop."""
+    def __init__(self):
+        self.hits = Counter()
+        self.peers = set()
+        self.active = 0
+        self.max_active = 0
+        self.capacity = 10
+        self.latency = 0.005
+        self.retry_after = 0.05
+        self.loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_get("/json/{n}", self.json)
+        app.router.add_get("/flaky/{n}", self.flaky)
+        app.router.add_get("/text", self.text)
+        app.router.add_get("/slow/{n}", self.slow)
+        app.router.add_get("/limited/{n}", self.limited)
+        app.router.add_get("/geocode/json", self.geocode)
+        app.router.add_put("/rmeta/text", self.tika)
+        self.runner = web.AppRunner(app)
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+
+    async def _start(self):
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def json(self, request):
+        self.hits[request.path] += 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+        return web.json_response({"n": int(request.match_info["n"])})
+
+    async def flaky(self, request):
+        self.hits[request.path] += 1
+        if self.hits[request.path] < 3:
+            return web.Response(status=503)
+        return web.json_response({"n": int(request.match_info["n"])})
+
+    async def slow(self, request):
+        n = int(request.match_info["n"])
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01 * (n % 5))
+        self.active -= 1
+        return web.json_response({"n": n})
+
+    async def limited(self, request):
+        """Simulates a rate limited API: latency grows with load beyond capacity, then 429s."""
+        n = int(request.match_info["n"])
+        if self.active >= self.capacity * 2:
+            self.hits["429"] += 1
+            return web.Response(status=429, headers={"Retry-After": str(self.retry_after)})
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.latency * max(1, self.active / self.capacity))
+        self.active -= 1
+        return web.json_response({"n": n})
+
+    async def text(self, request):
+        self.hits[request.path] += 1
+        return web.Response(text="not json")
+
+    async def geocode(self, request):
+        """Echoes the address back in the shape of a Google geocoding response."""
+        address = request.query["address"]
+        self.hits[f"geocode:{address}"] += 1
+        if not address.strip():
+            return web.json_response({"results": [], "status": "ZERO_RESULTS"})
+        location = {"lat": float(len(address)), "lng": float(sum(map(ord, address)) % 180)}
+        return web.json_response({"results": [{"formatted_address": address.upper(), "geometry": {"location": location}}], "status": "OK"})
+
+    async def tika(self, request):
+        """Mimics the Tika rmeta endpoint: echoes the document text, 422 for a corrupt document."""
+        body = await request.read()
+        self.hits["tika"] += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.latency)
+        self.active -= 1
+        if body.startswith(b"corrupt"):
+            return web.Response(status=422)
+        return web.json_response([{"Content-Type": "text/plain", "X-TIKA:content": body.decode()}])
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from starter_pack.core.base import Base
+
+
+class Arrays(Base):
+    def __init__(self):
+        self.X = np.arange(200_000, dtype=np.float64).reshape(-1, 4)
+
+
+class TestBasePersistence:
+    def setup_method(self):
+        self.obj = Arrays()
+
+    @pytest.mark.parametrize("compression", [None, "zlib", "lzma"])
+    def test_save_and_load(self, tmp_path, compression):
+        path = str(tmp_path / "arrays.joblib")
+        self.obj.save(path, compression=compression, level=1)
+        np.testing.assert_array_equal(Arrays.from_pickle(path).X, self.obj.X)
+
+    def test_memory_mapped_load(self, tmp_path):
+        path = str(tmp_path / "arrays.joblib")
+        self.obj.save(path)
+        loaded = Arrays.from_pickle(path, mmap_mode="r")
+        assert isinstance(loaded.X, np.memmap)
+        np.testing.assert_array_equal(loaded.X, self.obj.X)
+        with pytest.raises(ValueError):
+            self.obj.save(path, compression="zip")
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+from starter_pack.dataset.base import Dataset
+from starter_pack.processing import ProcessorPipeline
+from starter_pack.processing.processors import SKLearnProcessor
+
+
+class Frame(Dataset):
+    loads = 0
+
+    @classmethod
+    def load(cls):
+        cls.loads += 1
+        rng = np.random.default_rng(0)
+        return pd.DataFrame({"a": rng.normal(size=103), "b": rng.normal(size=103), "y": np.arange(103.0)})
+
+
+def scaled(label="y"):
+    return {"label": label, "processor": ProcessorPipeline([SKLearnProcessor(StandardScaler(), ["a", "b"])], [])}
+
+
+class TestFromSplits:
+    def setup_method(self):
+        Frame.loads = 0
+
+    @pytest.mark.parametrize("n_jobs", [1, 2])
+    def test_folds_in_order(self, n_jobs):
+        datasets = list(Frame.from_splits(folds=3, n_jobs=n_jobs, **scaled()))
+        assert len(datasets) == 3
+        assert [len(d.test[0]) for d in datasets] == [35, 34, 34]
+        assert list(datasets[0].test[1]) == list(np.arange(35.0))
+        for dataset in datasets:
+            # each fold fits its own processor on its training rows
+            np.testing.assert_allclose(dataset.train[0]["a"].mean(), 0, atol=1e-12)
+        assert datasets[0].processor is not datasets[1].processor
+
+    def test_loads_once_and_caches_folds(self, tmp_path):
+        first = list(Frame.from_splits(folds=4, cache_dir=str(tmp_path), **scaled()))
+        assert Frame.loads == 1
+        assert len(list(tmp_path.glob("*.joblib"))) == 4
+        cached = list(Frame.from_splits(folds=4, cache_dir=str(tmp_path), **scaled()))
+        for a, b in zip(first, cached):
+            pd.testing.assert_frame_equal(a.train[0], b.train[0])
+            pd.testing.assert_series_equal(a.test[1], b.test[1])
+        list(Frame.from_splits(folds=4, cache_dir=str(tmp_path), **scaled("a")))
+        assert len(list(tmp_path.glob("*.joblib"))) == 8
+
+    def test_save_without_data(self, tmp_path):
+        dataset = next(Frame.from_splits(folds=2, **scaled()))
+        dataset.save(str(tmp_path / "dataset.joblib"))
+        assert dataset.train is not None
+        loaded = Frame.from_pickle(str(tmp_path / "dataset.joblib"))
+        assert loaded.train is None and loaded.test is None and loaded.label == "y"
@@ -0,0 +1,77 @@
+import os
+import sys
+import subprocess
+import numpy as np
+import pandas as pd
+import openpyxl
+import pytest
+from starter_pack.io import Excel
+
+
+class TestExcelFileEngine:
+    def setup_method(self):
+        self.df = pd.DataFrame({
+            "a": [1, 2, 3],
+            "b": [1.5, np.nan, 2.0],
+            "c": ["x", None, "z"],
+            "d": pd.to_datetime(["2020-01-01", None, "2020-01-03"])
+        })
+
+    def test_round_trip_in_chunks(self, tmp_path):
+        excel = Excel(str(tmp_path / "book.xlsx"), engine="openpyxl", chunk_size=2)
+        excel.to_excel(self.df, "Data")
+        assert [len(chunk) for chunk in excel.iter_df("Data")] == [2, 1]
+        df = excel.to_df("Data")
+        pd.testing.assert_frame_equal(df, self.df, check_dtype=False)
+        assert df["a"].dtype == np.int64 and df["b"].dtype == np.float64
+        assert excel.to_df("Data", "A1", "B3").columns.tolist() == ["a", "b"]
+
+    def test_writes_into_existing_workbook(self, tmp_path):
+        path = tmp_path / "book.xlsx"
+        wb = openpyxl.Workbook()
+        wb.active.title = "Other"
+        wb["Other"]["B2"] = "=1+1"
+        data = wb.create_sheet("Data")
+        data["A1"], data["C2"], data["H3"] = "title", "stale", "note"
+        wb.save(path)
+
+        Excel(str(path), engine="openpyxl").to_excel(self.df, "Data", cell="B3", clear_range="A2:D2")
+        wb = openpyxl.load_workbook(path)
+        assert wb.sheetnames == ["Other", "Data"] and wb["Other"]["B2"].value == "=1+1"
+        assert wb["Data"]["A1"].value == "title" and wb["Data"]["C2"].value is None
+        assert wb["Data"]["H3"].value == "note" and wb["Data"]["B3"].value == "a"
+        assert Excel(str(path), engine="openpyxl").to_df("Data", "B3")["c"].tolist()[::2] == ["x", "z"]
+
+    def test_chunks_share_the_first_chunk_dtypes(self, tmp_path):
+        excel = Excel(str(tmp_path / "book.xlsx"), engine="openpyxl", chunk_size=2)
+        excel.to_excel(pd.DataFrame({"a": [1.5, 2.0, 3.0, np.nan], "b": [1, 2, 3, 4], "c": ["x", "y", 3, None]}), "Data")
+        chunks = list(excel.iter_df("Data"))
+        assert all((chunk.dtypes == chunks[0].dtypes).all() for chunk in chunks)
+        assert chunks[1]["b"].tolist() == [3, 4]
+
+        excel.to_excel(pd.DataFrame({"a": [1, 2, 3.5]}), "Fractions")
+        with pytest.raises(ValueError):
+            list(excel.iter_df("Fractions"))
+        chunks = list(excel.iter_df("Fractions", dtype={"a": float}))
+        assert chunks[1]["a"].tolist() == [3.5]
+        assert excel.to_df("Fractions")["a"].tolist() == [1, 2, 3.5]
+
+    def test_failed_save_leaves_no_temporary_file(self, tmp_path, monkeypatch):
+        excel = Excel(str(tmp_path / "book.xlsx"), engine="openpyxl")
+        excel.to_excel(self.df, "Data")
+        monkeypatch.setattr(os, "replace", lambda src, dst: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            excel.to_excel(self.df, "Data")
+        assert [p.name for p in tmp_path.iterdir()] == ["book.xlsx"]
+
+    def test_file_engine_runs_without_xlwings(self, tmp_path):
+        path = str(tmp_path / "book.xlsx")
+        code = (
+            "import sys\nsys.modules['xlwings'] = None\n"
+            "import pandas as pd\nfrom starter_pack.io import Excel\n"
+            f"excel = Excel({path!r}, engine='openpyxl')\n"
+            "excel.to_excel(pd.DataFrame({'a': [1, 2]}), 'Data')\n"
+            "print(excel.to_df('Data')['a'].tolist())"
+        )
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        assert out.strip() == "[1, 2]"
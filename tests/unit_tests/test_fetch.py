@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from starter_pack.io import AsyncFetch, FetchClient, FetchError, MemoryCache, SQLiteCache
+from starter_pack.io.cache import normalize_url
+from starter_pack.io.control import AdaptiveLimiter, FetchStats, retry_after
+from tests.stand_in import StandInServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = StandInServer()
+    yield server
+    server.close()
+
+
+class TestFetchCache:
+    def test_normalize_url(self):
+        assert normalize_url("HTTP://Example.com:80/a?b=2&a=1#frag") == "http://example.com/a?a=1&b=2"
+
+    def test_cached_urls_are_not_refetched(self, server, tmp_path):
+        fetcher = AsyncFetch(cache=SQLiteCache(str(tmp_path / "cache.db")))
+        urls = [f"{server.url}/json/{i}" for i in range(20)]
+        assert fetcher.fetch_all(urls[:10]) == [{"n": i} for i in range(10)]
+        assert fetcher.fetch_all(urls) == [{"n": i} for i in range(20)]
+        assert all(server.hits[f"/json/{i}"] == 1 for i in range(20))
+
+    def test_memory_cache_expires_and_evicts(self):
+        cache = MemoryCache(ttl=60, max_entries=2)
+        for i in range(3):
+            cache.set(f"http://a/{i}", i)
+        assert cache.get("http://a/0") is None and cache.get("http://a/2") == 2
+        cache.ttl = -1
+        assert cache.get("http://a/2") is None
+
+    def test_retries_and_per_url_errors(self, server):
+        fetcher = AsyncFetch(retries=3, backoff=0.01)
+        responses = fetcher.fetch_all([f"{server.url}/flaky/1", f"{server.url}/text", f"{server.url}/json/2"])
+        assert responses[0] == {"n": 1} and server.hits["/flaky/1"] == 3
+        assert isinstance(responses[1], FetchError)
+        assert responses[2] == {"n": 2}
+
+    def test_fetch_returns_a_single_response(self, server):
+        assert AsyncFetch().fetch(f"{server.url}/json/5") == {"n": 5}
+
+
+class TestFetchStream:
+    def test_ordered_stream_with_bounded_window(self, server):
+        server.max_active = 0
+        urls = (f"{server.url}/slow/{i}" for i in range(50))
+        results = list(AsyncFetch().fetch_iter(urls, window=8, ordered=True))
+        assert results == [(i, {"n": i}) for i in range(50)]
+        assert server.max_active <= 8
+
+    def test_async_source_inside_running_loop(self, server):
+        async def urls():
+            for i in range(20):
+                yield f"{server.url}/slow/{i}"
+
+        async def collect():
+            return [r async for r in AsyncFetch().fetch_stream(urls(), window=4)]
+
+        results = asyncio.run(collect())
+        assert sorted(results, key=lambda r: r[0]) == [(i, {"n": i}) for i in range(20)]
+
+    def test_concurrent_streams_keep_their_own_stats(self, server):
+        fetcher = AsyncFetch(retries=3, backoff=0.01)
+        slow, flaky = FetchStats(), FetchStats()
+
+        async def run(urls, window, stats):
+            return [r async for r in fetcher.fetch_stream(urls, window=window, stats=stats)]
+
+        async def both():
+            return await asyncio.gather(
+                run([f"{server.url}/slow/{i}" for i in range(30)], 2, slow),
+                run([f"{server.url}/flaky/{100 + i}" for i in range(10)], 10, flaky)
+            )
+
+        slow_results, flaky_results = asyncio.run(both())
+        assert len(slow_results) == 30 and len(flaky_results) == 10
+        assert (slow.completed, slow.requests, slow.retries) == (30, 30, 0)
+        assert (flaky.completed, flaky.requests, flaky.retries) == (10, 30, 20)
+        assert fetcher.stats in (slow, flaky)
+
+
+class TestFetchControl:
+    def test_retry_after_parsing(self):
+        assert retry_after({"Retry-After": "3"}) == 3
+        assert retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+        assert retry_after({}) is None
+
+    def test_adaptive_limiter_backs_off_from_rate_limits(self, server):
+        server.hits.clear()
+        fetcher = AsyncFetch(limiter=AdaptiveLimiter(initial=4), backoff=0.01)
+        responses = fetcher.fetch_all([f"{server.url}/limited/{i}" for i in range(300)], window=100)
+        assert responses == [{"n": i} for i in range(300)]
+        assert fetcher.stats.completed == 300
+        assert fetcher.stats.throttled == server.hits["429"] < 30
+        assert sum(fetcher.stats.histogram) == fetcher.stats.requests
+
+
+class TestFetchClient:
+    def test_connections_are_reused_across_calls(self, server):
+        server.peers.clear()
+        with AsyncFetch() as fetcher:
+            for i in range(5):
+                assert fetcher.fetch_all([f"{server.url}/json/{i}"]) == [{"n": i}]
+        assert len(server.peers) == 1
+        assert fetcher.client is None
+
+    def test_client_is_shared_between_fetchers(self, server):
+        server.peers.clear()
+        with FetchClient() as client:
+            for i in range(3):
+                assert AsyncFetch(client=client).fetch_all([f"{server.url}/json/{i}"]) == [{"n": i}]
+        assert len(server.peers) == 1 and not client.is_open
+
+    def test_async_context_manager(self, server):
+        async def run():
+            async with AsyncFetch() as fetcher:
+                first = [r async for r in fetcher.fetch_stream([f"{server.url}/json/1"])]
+                second = [r async for r in fetcher.fetch_stream([f"{server.url}/json/2"])]
+            return first + second
+
+        server.peers.clear()
+        assert asyncio.run(run()) == [(0, {"n": 1}), (0, {"n": 2})]
+        assert len(server.peers) == 1
@@ -0,0 +1,38 @@
+import pytest
+from starter_pack.io import SQLiteCache
+from starter_pack.utils.geocoding import Geocoder, normalize_address
+from tests.stand_in import StandInServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = StandInServer()
+    yield server
+    server.close()
+
+
+class TestGeocoder:
+    def setup_method(self):
+        self.addresses = ["1 Main Street, Sydney", "1 main st sydney", "2 George St.", " ", "1 MAIN ST., SYDNEY"]
+
+    def geocoder(self, server, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "geocode.db"), normalize=normalize_address)
+        geocoder = Geocoder("key", throttle_rate=None, geocode_cache=cache, raw_path=str(tmp_path / "raw.json"))
+        geocoder.url_base = f"{server.url}/geocode/json?"
+        return geocoder
+
+    def test_normalize_address(self):
+        assert normalize_address("  12 Rue de l'Église,  Paris ") == "12 rue de l eglise paris"
+        assert len({normalize_address(a) for a in self.addresses}) == 3
+
+    def test_duplicates_and_repeated_runs_hit_the_cache(self, server, tmp_path):
+        results = list(self.geocoder(server, tmp_path).encode_all(self.addresses, write_raw=True))
+        assert [r["address"] for r in results] == self.addresses
+        assert results[0]["formatted_address"] == results[1]["formatted_address"] == results[4]["formatted_address"]
+        assert results[3]["formatted_address"] == "ERROR"
+        assert server.hits["geocode:1 Main Street, Sydney"] == 1 and server.hits["geocode:2 George St."] == 1
+        assert len((tmp_path / "raw.json").read_text().splitlines()) == 3
+
+        rerun = list(self.geocoder(server, tmp_path).encode_all(self.addresses))
+        assert rerun == results
+        assert server.hits["geocode:1 Main Street, Sydney"] == 1 and server.hits["geocode: "] == 2
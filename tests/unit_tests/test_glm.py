@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+pm = pytest.importorskip("pymc3")
+from starter_pack.models.glm import GLM
+
+
+class TestGLMInference:
+    def setup_method(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(20_000, 3))
+        self.beta = np.array([1.5, -2.0, 0.5])
+        p = 1 / (1 + np.exp(-(0.3 + self.X @ self.beta)))
+        self.y = rng.binomial(1, p)
+
+    def test_minibatch_advi_recovers_coefficients(self):
+        model = GLM("bernoulli", prior_params={"mu": 0.0, "b": 10.0})
+        model.fit(self.X, self.y, samples=500, inference="advi", batch_size=512, n_iter=20_000, seed=1)
+        assert model.approx is not None and len(model.approx.hist) < 20_000
+        np.testing.assert_allclose(model.trace["beta"].mean(axis=0), self.beta, atol=0.25)
+        assert set(model.summary().index) >= {"alpha", "beta[0]"}
+
+    def test_minibatches_require_variational_inference(self):
+        with pytest.raises(ValueError):
+            GLM("bernoulli").fit(self.X, self.y, batch_size=512)
+
+    def test_forward_predicts_new_rows_with_shared_data(self):
+        model = GLM("bernoulli", prior_params={"mu": 0.0, "b": 10.0})
+        model.fit(self.X, self.y, samples=200, inference="advi", n_iter=5_000, seed=1)
+        X_new = self.X[:7]
+        p = model.forward(X_new)
+        assert p.shape == (7,)
+        assert np.all((p >= 0) & (p <= 1))
+        # predicting leaves the training data in the model
+        np.testing.assert_array_equal(model.model["X_data"].get_value(), self.X)
+        # the training data is swapped back in on refit rather than redefining the graph
+        graph = model.model
+        model.fit(self.X[:10_000], self.y[:10_000], samples=200, inference="advi", n_iter=5_000, seed=1)
+        assert model.model is graph
+        assert model.model["X_data"].get_value().shape == (10_000, 3)
+
+    def test_new_feature_count_redefines_the_graph(self):
+        model = GLM("bernoulli")
+        model.fit(self.X, self.y, samples=100, inference="advi", n_iter=1_000, seed=1)
+        graph = model.model
+        model.fit(self.X[:, :2], self.y, samples=100, inference="advi", n_iter=1_000, seed=1)
+        assert model.model is not graph
+        assert model.trace["beta"].shape == (100, 2)
+
+    def test_predict_posterior_matches_forward(self):
+        model = GLM("bernoulli", prior_params={"mu": 0.0, "b": 10.0})
+        model.fit(self.X, self.y, samples=500, inference="advi", n_iter=5_000, seed=1)
+        summary = model.predict_posterior(self.X[:50], quantiles=[0.05, 0.95])
+        np.testing.assert_allclose(summary.mean, model.forward(self.X[:50]), atol=0.1)
+        assert np.all(summary.quantiles[0] <= summary.mean) and np.all(summary.mean <= summary.quantiles[1])
+        with pytest.raises(NotImplementedError):
+            GLM("categorical").predict_posterior(self.X)
+
+    def test_chains_and_thinning(self):
+        model = GLM("bernoulli")
+        model.fit(self.X[:500], self.y[:500], samples=200, tune=200, chains=2, cores=1, thin=4, seed=1)
+        assert model.trace.nchains == 2
+        assert len(model.trace) == 50
+        with pytest.raises(ValueError):
+            model.fit(self.X, self.y, inference="advi", chains=2)
+
+    @pytest.mark.parametrize("name", ["trace.nc", "trace.zarr"])
+    def test_exported_trace_is_left_out_of_saves(self, tmp_path, name):
+        model = GLM("bernoulli", prior_params={"mu": 0.0, "b": 10.0})
+        model.fit(self.X, self.y, samples=2_000, inference="advi", n_iter=5_000, seed=1)
+        expected = model.predict_posterior(self.X[:10]).mean
+        model.save(tmp_path / "full.joblib")
+        model.export_trace(str(tmp_path / name))
+        model.save(tmp_path / "model.joblib")
+        assert (tmp_path / "model.joblib").stat().st_size < (tmp_path / "full.joblib").stat().st_size
+        loaded = GLM.from_pickle(tmp_path / "model.joblib")
+        assert loaded.trace is None
+        np.testing.assert_allclose(loaded.predict_posterior(self.X[:10]).mean, expected)
+        assert set(loaded.summary(var_names=["beta"]).index) == {"beta[0]", "beta[1]", "beta[2]"}
@@ -0,0 +1,28 @@
+import sys
+import subprocess
+import pytest
+from starter_pack.core.lazy import lazy_import
+
+HEAVY = ("aiohttp", "xlwings", "openpyxl", "shap", "pymc3", "theano", "statsmodels", "tika", "matplotlib")
+MODULES = (
+    "starter_pack.io", "starter_pack.processing", "starter_pack.models.base", "starter_pack.models.glm",
+    "starter_pack.models.timeseries", "starter_pack.models.timeseries.utils", "starter_pack.utils.text_extractor"
+)
+
+
+class TestLazyImports:
+    def setup_method(self):
+        self.code = f"import sys\nimport {', '.join(MODULES)}\nprint(sorted(m for m in {HEAVY!r} if m in sys.modules))"
+
+    def test_heavy_dependencies_are_not_imported(self):
+        out = subprocess.run([sys.executable, "-c", self.code], capture_output=True, text=True, check=True).stdout
+        assert out.strip() == "[]"
+
+    def test_attributes_load_on_first_access(self):
+        import starter_pack.io as io
+        assert io.AsyncFetch.__module__ == "starter_pack.io.fetch"
+        assert io.TextExtractor.__name__ == "TextExtactor" and "Excel" in dir(io)
+        with pytest.raises(AttributeError):
+            io.Missing
+        with pytest.raises(ImportError):
+            lazy_import("not_an_installed_module").anything
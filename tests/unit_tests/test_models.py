@@ -0,0 +1,158 @@
+import pickle
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.neighbors import KNeighborsRegressor
+from starter_pack.models.base import METRICS, PyMC3ModelBase, SKLearnModel, _thin
+from starter_pack.models.metrics import MetricAccumulator, jackknife_metrics
+from starter_pack.utils.sampling import Sampler
+
+
+class TestExplain:
+    def setup_method(self):
+        self.shap = pytest.importorskip("shap")
+        rng = np.random.default_rng(0)
+        self.X = pd.DataFrame(rng.normal(size=(400, 4)), columns=list("abcd"))
+        self.y = self.X["a"] * 2 - self.X["b"] + rng.normal(scale=0.1, size=400)
+
+    def fitted(self, estimator, **kwargs):
+        model = SKLearnModel(estimator, "mse", **kwargs)
+        model.fit(self.X, self.y)
+        return model
+
+    @pytest.mark.parametrize("estimator, explainer", [
+        (GradientBoostingRegressor, "TreeExplainer"), (LinearRegression, "LinearExplainer")
+    ])
+    def test_fast_explainers_are_additive(self, estimator, explainer):
+        model = self.fitted(estimator)
+        values = model.explain(self.X, self.X, nsamples=50, show_bar=False, n_jobs=2)
+        assert isinstance(model.explainer, getattr(self.shap, explainer)) and values.shape == (50, 4)
+        X_test = self.X.iloc[np.sort(np.random.default_rng(0).choice(400, 50, replace=False))]
+        expected = np.ravel(model.explainer.expected_value)[0]
+        np.testing.assert_allclose(expected + values.sum(axis=1), model.predict(X_test), atol=1e-6)
+
+    def test_kernel_fallback_is_cached(self, monkeypatch):
+        model = self.fitted(KNeighborsRegressor)
+        values = model.explain(self.X, self.X, nsamples=20, background=10, show_bar=False)
+        assert isinstance(model.explainer, self.shap.KernelExplainer) and values.shape == (20, 4)
+        monkeypatch.setattr(model.explainer, "shap_values", lambda *args, **kwargs: pytest.fail("recomputed"))
+        assert model.explain(self.X, self.X, nsamples=20, background=10, show_bar=False) is values
+
+    def test_new_training_data_is_not_served_from_cache(self):
+        model = self.fitted(KNeighborsRegressor)
+        values = model.explain(self.X, self.X, nsamples=20, background=10, show_bar=False)
+        background = model.explainer.data
+        shifted = model.explain(self.X + 5, self.X, nsamples=20, background=10, show_bar=False)
+        assert shifted is not values
+        assert not np.allclose(model.explainer.data.data, background.data)
+        assert not np.allclose(shifted, values)
+
+    def test_training_data_is_hashed_once_by_fit(self, monkeypatch):
+        model = self.fitted(KNeighborsRegressor)
+        values = model.explain(self.X, self.X, nsamples=20, background=10, show_bar=False)
+        hashed, hash = [], joblib.hash
+        monkeypatch.setattr(joblib, "hash", lambda obj, *args, **kwargs: hashed.append(obj) or hash(obj, *args, **kwargs))
+        assert model.explain(self.X, self.X, nsamples=20, background=10, show_bar=False) is values
+        assert hashed and not any(self.X is x for obj in hashed for x in (obj if isinstance(obj, tuple) else (obj,)))
+
+        restored = pickle.loads(pickle.dumps(self.fitted(KNeighborsRegressor)))
+        assert restored._train_key is None
+        np.testing.assert_allclose(restored.explain(self.X, self.X, nsamples=20, background=10, show_bar=False), values)
+
+
+class TestBatchPrediction:
+    def setup_method(self):
+        rng = np.random.default_rng(1)
+        self.X = pd.DataFrame(rng.normal(size=(1000, 3)), columns=list("abc"))
+        self.model = SKLearnModel(GradientBoostingRegressor, "mse", n_estimators=10)
+        self.model.fit(self.X, self.X["a"] + rng.normal(size=1000))
+        self.expected = self.model.predict(self.X)
+
+    @pytest.mark.parametrize("n_jobs, backend", [(1, "thread"), (3, "thread"), (2, "process")])
+    def test_blocks_match_forward(self, n_jobs, backend):
+        blocks = list(self.model.predict_batches(self.X, block_size=128, n_jobs=n_jobs, backend=backend))
+        assert [len(b) for b in blocks] == [128] * 7 + [104]
+        np.testing.assert_allclose(np.concatenate(blocks), self.expected)
+
+    def test_iterator_of_chunks(self):
+        chunks = (self.X.values[i:i + 300] for i in range(0, 1000, 300))
+        blocks = list(self.model.predict_batches(chunks, block_size=200, n_jobs=2))
+        assert [len(b) for b in blocks] == [200, 100] * 3 + [100]
+        np.testing.assert_allclose(np.concatenate(blocks), self.expected)
+
+
+class TestStreamingMetrics:
+    def setup_method(self):
+        rng = np.random.default_rng(2)
+        self.X = pd.DataFrame(rng.normal(size=(5000, 3)), columns=list("abc"))
+        self.y = 100 + self.X["a"] * 3 + rng.normal(size=5000)
+        self.model = SKLearnModel(LinearRegression, "mse")
+        self.model.fit(self.X, self.y)
+
+    def test_partitions_merge_to_full_metrics(self):
+        y, yhat = self.y.values, self.model.predict(self.X)
+        parts = [MetricAccumulator().update(y[a:b], yhat[a:b]) for a, b in [(0, 1), (1, 2000), (2000, 2000), (2000, 5000)]]
+        merged = sum(parts[1:], parts[0]).result()
+        full = self.model.evaluate(self.X, self.y)
+        assert merged.keys() == full.keys()
+        np.testing.assert_allclose([merged[k] for k in full], list(full.values()), rtol=1e-10)
+
+    def test_blockwise_evaluate(self):
+        full = self.model.evaluate(self.X, self.y)
+        blocked = self.model.evaluate(self.X, self.y, block_size=700, n_jobs=3)
+        np.testing.assert_allclose([blocked[k] for k in full], list(full.values()), rtol=1e-10)
+
+    def test_jackknife_metrics_leave_each_group_out(self):
+        y, yhat = self.y.values, self.model.predict(self.X)
+        labels = np.random.default_rng(0).permutation(len(y)) % 7
+        jack = jackknife_metrics(y, yhat, labels, 7)
+        for g in range(7):
+            keep = labels != g
+            for k, metric in METRICS.items():
+                np.testing.assert_allclose(jack[k][g], metric(y[keep], yhat[keep]), rtol=1e-9)
+
+
+class TestEvaluateCI:
+    def setup_method(self):
+        rng = np.random.default_rng(3)
+        self.X = pd.DataFrame(rng.normal(size=(2000, 3)), columns=list("abc"))
+        self.y = 10 + self.X["a"] * 3 + rng.exponential(size=2000)
+        self.model = SKLearnModel(LinearRegression, "mse")
+        self.model.fit(self.X, self.y)
+        self.metrics = self.model.evaluate(self.X, self.y)
+
+    @pytest.mark.parametrize("interval", ["percentile", "bca"])
+    def test_intervals_cover_metrics(self, interval):
+        ci = self.model.evaluate_ci(self.X, self.y, size=200, interval=interval, sampler=Sampler(seed=0))
+        assert ci.keys() == self.metrics.keys()
+        for k, (low, high) in ci.items():
+            assert low < self.metrics[k] < high
+
+
+class Bayesian(PyMC3ModelBase):
+    def _definition(self, model, X, y, total_size=None):
+        raise NotImplementedError
+
+
+class TestPyMC3State:
+    def bare(self, **state):
+        # skips __init__, so pymc3 is not needed to check what is pickled
+        model = object.__new__(Bayesian)
+        model.__dict__.update({"trace": "trace", "trace_path": None, "_inference_data": "idata", "_train_key": (None, "key"), **state})
+        return model
+
+    def test_transient_state_is_left_out_of_pickles(self):
+        restored = pickle.loads(pickle.dumps(self.bare()))
+        assert restored.trace == "trace" and restored._inference_data is None and restored._train_key is None
+
+    def test_exported_trace_is_left_out_of_pickles(self):
+        restored = pickle.loads(pickle.dumps(self.bare(trace_path="trace.nc")))
+        assert restored.trace is None and restored.trace_path == "trace.nc"
+
+    @pytest.mark.parametrize("n, thin, expected", [(10, 1, 10), (10, 3, 3), (12, 3, 4), (3, 3, 1)])
+    def test_thinning_keeps_whole_steps(self, n, thin, expected):
+        thinned = _thin(list(range(n)), thin)
+        assert thinned == list(range(0, thin * expected, thin))
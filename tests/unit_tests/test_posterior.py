@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from scipy.special import expit
+from starter_pack.models.glm.posterior import LINKS, predict_posterior
+
+
+class TestPredictPosterior:
+    def setup_method(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(1_001, 3))
+        self.alpha = rng.normal(0.3, 0.1, size=400)
+        self.beta = rng.normal([1.5, -2.0, 0.5], 0.1, size=(400, 3))
+
+    def draws(self, link):
+        eta = np.stack([a + self.X @ b for a, b in zip(self.alpha, self.beta)], axis=1)
+        return {"identity": eta, "exp": np.exp(eta), "sigmoid": expit(eta)}[link]
+
+    @pytest.mark.parametrize("link", list(LINKS))
+    def test_matches_draw_by_draw(self, link):
+        expected = self.draws(link)
+        summary = predict_posterior(self.X, self.alpha, self.beta, link, quantiles=[0.05, 0.5, 0.95], block_size=97)
+        np.testing.assert_allclose(summary.mean, expected.mean(axis=1), rtol=1e-10)
+        np.testing.assert_allclose(summary.quantiles, np.quantile(expected, [0.05, 0.5, 0.95], axis=1), rtol=1e-10)
+
+    def test_identity_mean_without_quantiles(self):
+        summary = predict_posterior(self.X, self.alpha, self.beta)
+        assert summary.quantiles is None
+        np.testing.assert_allclose(summary.mean, self.draws("identity").mean(axis=1))
+
+    def test_block_size_from_max_elements(self):
+        full = predict_posterior(self.X, self.alpha, self.beta, "sigmoid")
+        small = predict_posterior(self.X, self.alpha, self.beta, "sigmoid", max_elements=1_000)
+        np.testing.assert_allclose(small.mean, full.mean)
+
+    def test_invalid_inputs(self):
+        with pytest.raises(ValueError):
+            predict_posterior(self.X, self.alpha, self.beta, "softmax")
+        with pytest.raises(ValueError):
+            predict_posterior(self.X[:, :2], self.alpha, self.beta, "exp")
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from starter_pack.utils.sampling import Sampler, BootstrapMethods, _index_blocks
+
+
+class TestBootstrap:
+    def setup_method(self):
+        self.X = np.random.default_rng(0).exponential(size=500)
+
+    def test_balanced_blocks_use_every_index_equally(self):
+        counts = np.zeros(100, dtype=int)
+        for idx in _index_blocks(np.random.default_rng(0), 100, 37, BootstrapMethods.BALANCED, None, 500):
+            assert idx.size <= 500
+            np.add.at(counts, idx.ravel(), 1)
+        assert np.all(counts == 37)
+
+    def test_distribution_is_reproducible(self):
+        a = Sampler(seed=1).bootstrap_distribution(self.X, 200)
+        b = Sampler(seed=1).bootstrap_distribution(self.X, 200)
+        assert a.shape == (200,)
+        np.testing.assert_array_equal(a, b)
+
+    def test_vectorized_matches_non_vectorized(self):
+        a = Sampler(seed=1).bootstrap_distribution(self.X, 50, np.mean, vectorized=True)
+        b = Sampler(seed=1).bootstrap_distribution(self.X, 50, np.mean, vectorized=False)
+        np.testing.assert_allclose(a, b)
+
+    def test_confidence_intervals_cover_mean(self):
+        for interval in ('percentile', 'bca'):
+            low, high = Sampler(seed=1).confidence_interval(self.X, 500, interval=interval)
+            assert low < self.X.mean() < high
+
+    def test_multi_output_statistic(self):
+        stat = lambda x, axis: np.percentile(x, [10, 90], axis=axis).T
+        low, high = Sampler(seed=1).confidence_interval(self.X, 200, stat, interval='bca')
+        assert low.shape == high.shape == (2,)
+        assert np.all(low < high)
+
+    def test_jackknife_from_group_sums_matches_per_group(self):
+        def jackknife(X, labels, groups):
+            return (X.sum() - np.bincount(labels, X, groups)) / (len(X) - np.bincount(labels, minlength=groups))
+
+        slow = Sampler(seed=1).confidence_interval(self.X, 200, interval='bca', jackknife_groups=50)
+        fast = Sampler(seed=1).confidence_interval(self.X, 200, interval='bca', jackknife_groups=50, jackknife=jackknife)
+        np.testing.assert_allclose(fast, slow, rtol=1e-10)
+
+
+class TestRebalancing:
+    def setup_method(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            "y": rng.choice(["a", "b", "c"], p=[0.9, 0.08, 0.02], size=5000),
+            "x": np.arange(5000)
+        })
+        self.counts = self.df.y.value_counts()
+
+    def test_undersample_to_smallest_stratum(self):
+        sample = Sampler(seed=0).undersample(self.df, labels="y")
+        assert set(sample.y.value_counts()) == {self.counts.min()}
+        assert sample.x.is_unique and sample.x.is_monotonic_increasing
+
+    def test_oversample_keeps_every_row(self):
+        idx = Sampler(seed=0).oversample(self.df, labels="y", return_indices=True)
+        assert len(idx) == 3 * self.counts.max()
+        assert set(idx) == set(range(len(self.df)))
+
+    def test_reservoir_matches_stratum_sizes(self):
+        chunks = (self.df.iloc[i:i + 700] for i in range(0, len(self.df), 700))
+        sample = Sampler(seed=0).reservoir_sample(chunks, 200, labels="y", oversample=True)
+        assert set(sample.y.value_counts()) == {200}
+        assert sample[sample.y == "a"].x.is_unique
+
+    def test_reservoir_with_callable_labels(self):
+        chunks = (self.df.iloc[i:i + 700] for i in range(0, len(self.df), 700))
+        sample = Sampler(seed=0).reservoir_sample(chunks, 50, labels=lambda chunk: chunk.x % 7)
+        assert set((sample.x % 7).value_counts()) == {50}
+
+    def test_reservoir_of_empty_stream(self):
+        assert Sampler(seed=0).reservoir_sample(iter(()), 10).shape == (0,)
+        sample = Sampler(seed=0).reservoir_sample([self.df.iloc[:0]], 10, labels="y")
+        assert sample.empty and list(sample.columns) == ["y", "x"]
+
+
+class TestRowBootstrap:
+    def setup_method(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(400, 2))
+        self.y = self.X @ np.array([1.0, 2.0]) + rng.normal(size=400)
+
+    def test_rows_are_resampled_together(self):
+        data = np.column_stack((self.X, self.y))
+        ols = lambda s: np.linalg.lstsq(s[:, :2], s[:, 2], rcond=None)[0]
+        low, high = Sampler(seed=0).confidence_interval(data, 200, ols)
+        beta = ols(data)
+        assert np.all(low < beta) and np.all(beta < high)
+
+    def test_dataframe_rows_reach_statistic(self):
+        df = pd.DataFrame(self.X, columns=["a", "b"])
+        dist = Sampler(seed=0).bootstrap_distribution(df, 20, lambda d: d["a"].mean())
+        assert dist.shape == (20,)
+
+    def test_block_methods_keep_runs_of_rows(self):
+        series = np.arange(1000.0)
+        for method in ("moving", "stationary"):
+            sample = next(Sampler(seed=0).bootstrap(series, 1, stat=lambda s: s, method=method, block_length=50))
+            assert sample.shape == (1000,)
+            assert np.mean(np.diff(sample) == 1) > 0.9
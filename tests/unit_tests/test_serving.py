@@ -0,0 +1,46 @@
+import asyncio
+import numpy as np
+from aiohttp.test_utils import TestClient, TestServer
+from starter_pack.models.serving import MicroBatcher, create_app
+
+
+class SumModel:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=float)
+        if np.isnan(X).any():
+            raise ValueError("NaN in batch")
+        self.batch_sizes.append(len(X))
+        return X.sum(axis=1)
+
+
+class TestMicroBatcher:
+    def setup_method(self):
+        self.model = SumModel()
+
+    def test_batches_and_scatters_results(self):
+        async def run():
+            batcher = MicroBatcher(self.model, max_batch_size=16, max_wait=0.01)
+            results = await asyncio.gather(*(batcher.predict([i, 1.0]) for i in range(100)))
+            await batcher.stop()
+            return results, batcher.stats
+
+        results, stats = asyncio.run(run())
+        assert list(results) == [i + 1.0 for i in range(100)]
+        assert max(self.model.batch_sizes) == 16 and len(self.model.batch_sizes) < 100
+        assert stats.requests == 100 and stats.max_queue_depth >= 16 and stats.percentile(99) > 0
+
+    def test_http_endpoint_and_failed_batches(self):
+        async def run():
+            batcher = MicroBatcher(self.model, max_batch_size=8, max_wait=0.05, columns=["a", "b"])
+            async with TestClient(TestServer(create_app(batcher))) as client:
+                ok = await client.post("/predict", json={"a": 1, "b": 2})
+                bad = await client.post("/predict", json=[float("nan"), 1])
+                stats = await (await client.get("/stats")).json()
+                return await ok.json(), bad.status, stats
+
+        ok, bad_status, stats = asyncio.run(run())
+        assert ok == {"prediction": 3.0} and bad_status == 500
+        assert stats["requests"] == 2 and stats["errors"] == 1 and stats["queue_depth"] == 0
@@ -0,0 +1,92 @@
+import hashlib
+import pytest
+from starter_pack.utils.manifest import Manifest, hash_file, walk_files
+from starter_pack.utils.text_extractor import TextExtactor
+from tests.stand_in import StandInServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = StandInServer()
+    yield server
+    server.close()
+
+
+class TestTextExtractor:
+    def setup_method(self):
+        self.documents = {f"doc{i}.txt": f"document {i}" for i in range(30)}
+        self.documents.update({"copy.txt": "document 0", "bad.txt": "corrupt", "skip.pdf": "not selected"})
+
+    def write_corpus(self, tmp_path):
+        input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+        (input_dir / "nested").mkdir(parents=True)
+        output_dir.mkdir()
+        for name, text in self.documents.items():
+            (input_dir / "nested" / name).write_text(text)
+        return input_dir, output_dir
+
+    def test_concurrent_extraction_isolates_failures(self, server, tmp_path):
+        input_dir, output_dir = self.write_corpus(tmp_path)
+        server.max_active = 0
+        extractor = TextExtactor(server.url, str(output_dir), workers=8)
+        results = list(extractor.extract(input_dir, file_types=[".txt"]))
+        assert sorted(text for _, text in results) == sorted(f"document {i}" for i in range(30))
+        assert len(list(output_dir.glob("*.txt"))) == 30
+        assert 1 < server.max_active <= 8
+
+        assert list(extractor.extract(input_dir, file_types=[".txt"])) == []
+
+    def test_manifest_skips_unchanged_files_without_hashing(self, server, tmp_path, monkeypatch):
+        input_dir, output_dir = self.write_corpus(tmp_path)
+        extractor = TextExtactor(server.url, str(output_dir), workers=4)
+        assert len(list(extractor.extract(input_dir, file_types=[".txt"]))) == 30
+        extractor.manifest.close()
+
+        extractor = TextExtactor(server.url, str(output_dir), workers=4)
+        hashed = []
+        monkeypatch.setattr(extractor, "hash_file", lambda path: hashed.append(path) or hash_file(path))
+        (input_dir / "nested" / "doc1.txt").write_text("document 1, revised")
+        results = list(extractor.extract(input_dir, file_types=[".txt"]))
+        assert [text for _, text in results] == ["document 1, revised"]
+        assert [p.name for p in hashed] == ["doc1.txt"]
+
+    def test_resume_retries_directories_with_failed_files(self, server, tmp_path):
+        input_dir, output_dir = self.write_corpus(tmp_path)
+        (input_dir / "clean").mkdir()
+        (input_dir / "clean" / "other.txt").write_text("other document")
+        extractor = TextExtactor(server.url, str(output_dir), workers=4)
+        assert len(list(extractor.extract(input_dir, file_types=[".txt"]))) == 31
+        nested, clean = input_dir / "nested", input_dir / "clean"
+        assert extractor.manifest.directory_done(str(nested), nested.stat().st_mtime) is None
+        assert extractor.manifest.directory_done(str(clean), clean.stat().st_mtime) is not None
+
+        # only the failed file is sent again, the rest of its directory are known duplicates
+        hits = server.hits["tika"]
+        assert list(extractor.extract(input_dir, file_types=[".txt"], resume=True)) == []
+        assert server.hits["tika"] == hits + 1
+
+        (nested / "bad.txt").write_text("repaired")
+        assert [text for _, text in extractor.extract(input_dir, file_types=[".txt"], resume=True)] == ["repaired"]
+        assert extractor.manifest.directory_done(str(nested), nested.stat().st_mtime) is not None
+        assert list(extractor.extract(input_dir, file_types=[".txt"], resume=True)) == []
+
+    def test_hash_file_streams_in_chunks(self, tmp_path):
+        path = tmp_path / "blob.bin"
+        path.write_bytes(bytes(range(256)) * 1000)
+        assert hash_file(path, chunk_size=1000) == hashlib.md5(path.read_bytes()).hexdigest()
+
+    def test_walk_files_resumes_from_checkpoint(self, tmp_path):
+        for d in ["a", "a/b", "c"]:
+            (tmp_path / d).mkdir()
+            for ext in [".PDF", ".txt", ".doc"]:
+                (tmp_path / d / f"file{ext}").write_text(d)
+        manifest = Manifest(str(tmp_path / "manifest.db"))
+        serial = [(l.path, l.files) for l in walk_files(tmp_path, [".pdf", "doc"], checkpoint=manifest)]
+        parallel = [(l.path, l.files) for l in walk_files(tmp_path, [".pdf", "doc"], workers=3)]
+        assert sorted(serial) == sorted(parallel) and len(serial) == 4
+        assert sorted(serial)[1] == (str(tmp_path / "a"), [str(tmp_path / "a" / "file.PDF"), str(tmp_path / "a" / "file.doc")])
+
+        for listing in walk_files(tmp_path, checkpoint=manifest):
+            if listing.path != str(tmp_path / "a"):
+                manifest.mark_directory(listing)
+        assert [l.path for l in walk_files(tmp_path, checkpoint=manifest, workers=2)] == [str(tmp_path / "a")]
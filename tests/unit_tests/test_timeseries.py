@@ -0,0 +1,127 @@
+import sys
+import subprocess
+import numpy as np
+import pandas as pd
+from statsmodels.tsa import stattools
+from starter_pack.models.timeseries.utils import check_stationary_all, lagged_cross_corr
+
+
+def shifted_corr(x: pd.Series, y: pd.Series, lags, min_periods: int = 2) -> np.ndarray:
+    result = []
+    for lag in lags:
+        shifted = y.shift(lag)
+        valid = x.notna() & shifted.notna()
+        result.append(x.corr(shifted) if valid.sum() >= min_periods else np.nan)
+    return np.array(result)
+
+
+class TestLaggedCrossCorr:
+    def setup_method(self):
+        rng = np.random.default_rng(0)
+        self.x = pd.Series(rng.normal(size=300).cumsum())
+        self.y = pd.Series(self.x.shift(7).fillna(0) + rng.normal(size=300))
+
+    def test_matches_pandas_shift_corr(self):
+        lags, r = lagged_cross_corr(self.x, self.y, lags=20)
+        np.testing.assert_array_equal(lags, np.arange(-20, 21))
+        np.testing.assert_allclose(r, shifted_corr(self.x, self.y, lags), atol=1e-9)
+        assert lags[np.argmax(r)] == -7
+
+    def test_lag_tuple_and_sequence(self):
+        lags, r = lagged_cross_corr(self.x, self.y, lags=(3, 9))
+        np.testing.assert_array_equal(lags, np.arange(3, 10))
+        np.testing.assert_allclose(r, shifted_corr(self.x, self.y, lags), atol=1e-9)
+        lags, r = lagged_cross_corr(self.x, self.y, lags=[-250, 0, 250])
+        np.testing.assert_allclose(r, shifted_corr(self.x, self.y, lags), atol=1e-9)
+
+    def test_nans_and_min_periods(self):
+        x, y = self.x.copy(), self.y.copy()
+        x[::5] = np.nan
+        y[10:40] = np.nan
+        lags = np.arange(-295, 296)
+        _, r = lagged_cross_corr(x, y, lags=lags, min_periods=10)
+        np.testing.assert_allclose(r, shifted_corr(x, y, lags, min_periods=10), atol=1e-8)
+        assert np.isnan(r[0]) and np.isnan(r[-1])
+
+    def test_wrap_matches_roll(self):
+        lags, r = lagged_cross_corr(self.x, self.y, lags=15, wrap=True)
+        expected = [np.corrcoef(self.x, np.roll(self.y, lag))[0, 1] for lag in lags]
+        np.testing.assert_allclose(r, expected, atol=1e-9)
+
+    def test_pairwise(self):
+        X = pd.DataFrame({"a": self.x, "b": self.y})
+        Y = pd.DataFrame({"c": self.y, "d": -self.x, "e": self.x ** 2})
+        lags, r = lagged_cross_corr(X, Y, lags=5, pairwise=True)
+        assert r.shape == (2, 3, 11)
+        for i, a in enumerate(X):
+            for j, b in enumerate(Y):
+                np.testing.assert_allclose(r[i, j], shifted_corr(X[a], Y[b], lags), atol=1e-9)
+
+
+class TestCheckStationaryAll:
+    def setup_method(self):
+        rng = np.random.default_rng(0)
+        noise = rng.normal(size=(400, 2))
+        self.df = pd.DataFrame({
+            "noise": noise[:, 0],
+            "walk": noise[:, 1].cumsum(),
+            "constant": np.ones(400),
+            "trend": np.r_[np.arange(6.0), [np.nan] * 394],
+        })
+
+    def test_orders_and_errors(self):
+        result = check_stationary_all(self.df, kpss=True, n_jobs=1)
+        assert list(result.index) == list(self.df.columns)
+        assert result.loc["noise", "diff_order"] == 0 and result.loc["noise", "stationary"]
+        assert result.loc["walk", "diff_order"] == 1 and result.loc["walk", "stationary"]
+        assert result.loc["trend", "n_obs"] == 6
+        for series, order in [("constant", 0), ("trend", 1)]:
+            # the error is reported at the order it happened with no stats from other orders
+            row = result.loc[series]
+            assert row["diff_order"] == order and not row["stationary"]
+            assert "constant" in row["error"]
+            assert row[["adf_stat", "adf_pvalue", "adf_lags", "kpss_stat", "kpss_pvalue"]].isna().all()
+        assert result[["error"]].loc[["noise", "walk"]].isna().all().all()
+
+    def test_untestable_series_are_reported_per_row(self, monkeypatch):
+        df = self.df.assign(empty=np.nan)
+        result = check_stationary_all(df, n_jobs=1)
+        assert result.loc["empty", "error"] == "The series has no observations."
+        assert result.loc["constant", "error"] == "The series is constant."
+
+        adfuller = stattools.adfuller
+        def failing(y, **kwargs):
+            if len(y) == 399:
+                raise RuntimeError("unexpected")
+            return adfuller(y, **kwargs)
+
+        monkeypatch.setattr(stattools, "adfuller", failing)
+        result = check_stationary_all(df, kpss=True, n_jobs=1)
+        assert result.loc["walk", "error"] == "RuntimeError: unexpected"
+        assert result.loc["walk", "diff_order"] == 1
+        assert result.loc["noise", "stationary"]
+
+    def test_parallel_matches_serial(self):
+        df = pd.concat([self.df] * 3, axis=1, ignore_index=True)
+        serial = check_stationary_all(df, n_jobs=1)
+        parallel = check_stationary_all(df, n_jobs=2, chunk_size=3)
+        pd.testing.assert_frame_equal(serial, parallel)
+
+    def test_batch_is_silent_on_first_statsmodels_import(self):
+        # a fresh interpreter, so statsmodels is first imported inside the batch
+        code = (
+            "import warnings\nimport numpy as np, pandas as pd\n"
+            "from starter_pack.models.timeseries.utils import check_stationary_all\n"
+            "rng = np.random.default_rng(0)\n"
+            "df = pd.DataFrame({'noise': rng.normal(size=400), 'walk': rng.normal(size=400).cumsum()})\n"
+            "with warnings.catch_warnings(record=True) as caught:\n"
+            "    warnings.simplefilter('always')\n"
+            "    check_stationary_all(df, kpss=True, n_jobs=1)\n"
+            "print([str(w.message) for w in caught])"
+        )
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        assert out.strip() == "[]"
+
+    def test_batch_emits_no_warnings(self, recwarn):
+        check_stationary_all(self.df, kpss=True, n_jobs=1)
+        assert len(recwarn) == 0